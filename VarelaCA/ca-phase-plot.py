@@ -4,13 +4,18 @@
 # To run:
 # python plot-ca.py
 
+import os
+import sys
 import pygame
 from pygame.locals import *
 import pylab as p
 import numpy as np
-from scipy.sparse import lil_matrix
 from ca import CA
 
+# the phase field is shared with the liquid automaton's phase plots, in the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from phase import PhaseField
+
 SIDE = 400
 W = 20 # moving average 'window'
 SAMPLES = 500 # must be >= W
@@ -43,29 +48,7 @@ class Plot(CA):
 
             # Fig 3. Phase Plot delta S by delta J
             fig3 = p.figure()
-            x = np.diff(plotJ)
-            y = np.diff(plotS)
-            dx = np.diff(x)
-            dy = np.diff(y)
-            n = len(dx)
-            sumx = lil_matrix((DIM, DIM))
-            sumy =  lil_matrix((DIM, DIM))
-            sumn =  lil_matrix((DIM, DIM))
-            for i in range(n):
-                # index by row, col
-                sumx[round(y[i]+(DIM/2)),round(x[i]+(DIM/2))] += dx[i]
-                sumy[round(y[i]+(DIM/2)),round(x[i]+(DIM/2))] += dy[i]
-                sumn[round(y[i]+(DIM/2)),round(x[i]+(DIM/2))] +=1
-            _x = []
-            _y = []
-            _dx = []
-            _dy = []
-            rows,cols = sumn.nonzero()
-            for row,col in zip(rows,cols):
-                _x.append(col-(DIM/2))
-                _y.append(row-(DIM/2))
-                _dx.append(sumx[row,col] / sumn[row,col] )
-                _dy.append(sumy[row,col] / sumn[row,col] )
+            _x, _y, _dx, _dy = PhaseField(DIM).add(plotJ, plotS).quiver()
 
             M = np.ones(len(_x))
             p.quiver(_x,_y,_dx,_dy,M,pivot='mid', cmap=p.cm.jet)
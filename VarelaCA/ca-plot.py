@@ -4,77 +4,42 @@
 # To run:
 # python plot-ca.py
 
+import os
+import sys
 import pygame
 from pygame.locals import *
-import pylab as p
-import numpy as np
 from ca import CA
 
+# the plotting process is shared with the liquid automaton, in the parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from plotsink import PlotSink
+
 SIDE = 400
 W = 20 # moving average 'window'
 SAMPLES = 100 # must be >= W
+EVERY = 10 # samples between redraws of the figures
 CATALYSTS = [(4,4)] # (x,y)
 
 # pygame color objects
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 
-plotS = []
-plotL = []
-plotJ = []
-plotX = []
-
-def moving_average(x, w):
-    return np.convolve(x, np.ones(w), 'valid') / w
-
 class Plot(CA):
     def __init__(self,C):
         super(Plot, self).__init__(C)
         self.step = 0
+        # figures are drawn in another process, so the automaton keeps its frame rate
+        self.sink = PlotSink('images', every=EVERY, w=W, dim=50, bonds='joints')
 
     def Step(self):
-        global plotS, plotL, plotJ, plotX
         super(Plot, self).Step()
 
-
-        plotS.append(self.countS)
-        plotL.append(self.countL)
-        plotJ.append(self.countJ)
-        plotX.append(self.step)
+        self.sink.put(self.step, self.countS, self.countL, self.countJ)
         self.step += 1
         print(self.step)
 
         if self.step==SAMPLES+W:
-            n = SAMPLES
-            t = plotX[:n]
-
-            # Fig 1. Plot S,L,J by time
-            fig1, ax1 = p.subplots()
-            ax2 = ax1.twinx()
-            ax1.plot(t, plotS[:n], label='substrate', color='red')
-            ax2.plot(t, plotL[:n], label='links', color='green')
-            ax2.plot(t, plotJ[:n], label='joints', color='blue')
-            ax1.set_xlabel('time')
-            ax1.set_ylabel('substrate')
-            ax2.set_ylabel('links and joints')
-            fig1.legend(loc='upper left')
-            p.grid()
-            fig1.savefig('images/fig1.png')
-
-            # Fig 2. Plot rate of change S,L,J by time
-            fig2 = p.figure()
-            s = moving_average(np.diff(plotS),W)
-            l = moving_average(np.diff(plotL),W)
-            j = moving_average(np.diff(plotJ),W)
-            p.plot(t, s[:n], 'r-', label='substrate')
-            p.plot(t, l[:n], 'g-', label='links')
-            p.plot(t, j[:n], 'b-', label='joints')
-            p.legend(loc='best')
-            p.xlabel('time')
-            p.ylabel('rate of change ('+str(W)+' sec moving avg)')
-            p.grid()
-            fig2.savefig('images/fig2.png')
-
+            self.sink.close()
             exit()
 
 pygame.init()
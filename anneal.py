@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+# Simulated Autopoiesis in Liquid Automata
+# Temperature (DELTA) schedules in simulation time. Attached to a world, a schedule sets liquid.delta
+# after every step, so a ramp runs at the same rate whatever the frame rate, in the GUI or headless.
+#
+# Or, instead of one long ramp, run replicas at several fixed DELTA side by side in a process pool,
+# reporting their S, L, J as they go, to map the homeostatic range in one job.
+
+# To run:
+# python anneal.py steps --start 15 --increment 0.25 --period 10 --seconds 500
+# python anneal.py fixed --deltas 5 10 15 20 25 30 --seconds 600
+
+import argparse
+from math import cos, pi
+import numpy as np
+from liquid import Liquid, DELTA, HZ
+from ensemble import Ensemble
+
+
+# DELTA held constant; the schedules below vary it with time
+class Schedule(object):
+
+    def __init__(self,delta=DELTA):
+        self.delta = delta
+
+    # DELTA at simulated time t
+    def at(self,t):
+        return self.delta
+
+    # set a world's DELTA now, and after each of its steps
+    def attach(self,liquid):
+        liquid.delta = self.at(liquid.time)
+        liquid.observers.append(self)
+        return self
+
+    def __call__(self,liquid):
+        liquid.delta = self.at(liquid.time)
+
+
+# from start, changing by rate per simulated second, held at stop once reached
+class Linear(Schedule):
+
+    def __init__(self,start=DELTA,rate=0.025,stop=None):
+        self.start = start
+        self.rate = rate
+        self.stop = stop
+
+    def at(self,t):
+        delta = self.start + self.rate*t
+        if self.stop is not None:
+            delta = min(delta, self.stop) if self.rate>=0 else max(delta, self.stop)
+        return delta
+
+
+# from start, changing by increment every period simulated seconds (as auto-tcv-delta.py)
+class Steps(Schedule):
+
+    def __init__(self,start=DELTA,increment=0.25,period=10):
+        self.start = start
+        self.increment = increment
+        self.period = period
+
+    def at(self,t):
+        # a small tolerance, as the sum of many dt is not exact
+        return self.start + self.increment*int(t/self.period + 1e-9)
+
+
+# between low and high and back again every period simulated seconds, smoothly or linearly
+class Cyclic(Schedule):
+
+    def __init__(self,low=10,high=20,period=120,shape="sine"):
+        if shape not in ("sine", "triangle"):
+            raise ValueError("shape must be sine or triangle, not {}".format(shape))
+        self.low = low
+        self.high = high
+        self.period = period
+        self.shape = shape
+
+    def at(self,t):
+        phase = (t/self.period) % 1.0
+        if self.shape=="sine":
+            x = (1 - cos(2*pi*phase))/2
+        else:
+            x = 1 - abs(1 - 2*phase)
+        return self.low + (self.high-self.low)*x
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the liquid automaton under a DELTA schedule, or at several fixed DELTA in parallel")
+    parser.add_argument("schedule", choices=["linear", "steps", "cyclic", "fixed"])
+    parser.add_argument("--seconds", type=float, default=500, help="simulated seconds to run")
+    parser.add_argument("--every", type=float, default=10, help="report S, L, J every n simulated seconds")
+    parser.add_argument("--start", type=float, default=DELTA, help="linear, steps: initial DELTA")
+    parser.add_argument("--rate", type=float, default=0.025, help="linear: change in DELTA per simulated second")
+    parser.add_argument("--stop", type=float, default=None, help="linear: final DELTA")
+    parser.add_argument("--increment", type=float, default=0.25, help="steps: change in DELTA per period")
+    parser.add_argument("--period", type=float, default=None, help="steps, cyclic: period in simulated seconds")
+    parser.add_argument("--low", type=float, default=10, help="cyclic: lowest DELTA")
+    parser.add_argument("--high", type=float, default=20, help="cyclic: highest DELTA")
+    parser.add_argument("--shape", choices=["sine", "triangle"], default="sine", help="cyclic: wave shape")
+    parser.add_argument("--deltas", type=float, nargs="+", default=[5, 10, 15, 20, 25, 30], help="fixed: DELTA of each replica")
+    parser.add_argument("--pop", type=int, default=None, help="substrate population")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None, help="fixed: worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    world = {} if args.pop is None else {"n": args.pop}
+    steps, every = int(round(args.seconds*HZ)), max(1, int(round(args.every*HZ)))
+
+    if args.schedule=="fixed":
+        # a replica per DELTA, reported a row at a time once every replica has reached it
+        ensemble = Ensemble(len(args.deltas), steps, every, seed=args.seed, processes=args.processes,
+                            worlds=[{"delta": d} for d in args.deltas], **world)
+        print("time\t" + "\t".join("S,L,J at {:g}".format(d) for d in args.deltas))
+        reported = 0
+        for index, i, time, s, l, j in ensemble.stream():
+            while reported<len(ensemble.T) and not np.isnan(ensemble.S[:,reported]).any():
+                print("{:.1f}\t".format(ensemble.T[reported]) + "\t".join("{:.0f},{:.0f},{:.0f}".format(
+                      ensemble.S[r,reported], ensemble.L[r,reported], ensemble.J[r,reported]) for r in range(len(args.deltas))))
+                reported += 1
+    else:
+        if args.schedule=="linear":
+            schedule = Linear(args.start, args.rate, args.stop)
+        elif args.schedule=="steps":
+            schedule = Steps(args.start, args.increment, args.period or 10)
+        else:
+            schedule = Cyclic(args.low, args.high, args.period or 120, args.shape)
+        liquid = Liquid(seed=args.seed, **world)
+        schedule.attach(liquid)
+        print("time\tDELTA\tS\tL\tJ")
+        while liquid.steps<steps:
+            liquid.simulate(min(every, steps-liquid.steps))
+            print("{:.1f}\t{:.2f}\t{}\t{}\t{}".format(liquid.time, liquid.delta, liquid.countS, liquid.countL, liquid.countJ))
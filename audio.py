@@ -0,0 +1,100 @@
+# Simulated Autopoiesis in Liquid Automata
+# Sound effects for reactions, kept off the step path. The reaction hooks only count events; after
+# each step, as an observer, the counts are coalesced into at most one sound per event type, no more
+# often than that type's interval, and handed to a playback thread. The thread starts the mixer and
+# decodes each sound the first time it is wanted, so nothing is loaded or initialised at import.
+# Audio is off in headless runs (SDL's dummy drivers), and if the mixer cannot be started.
+
+# e.g.
+# audio = Audio({"composition": ["sounds/diamond_1.mp3"], ...}).attach(liquid)
+# audio.event("composition") # in Liquid.Composition
+# audio.play("ambience", loops=-1)
+
+import os
+import random
+import threading
+from collections import defaultdict
+from queue import Queue, Full
+from time import perf_counter
+
+INTERVAL = 0.1 # least time (seconds, real time) between sounds of one event type
+QUEUE = 16 # sounds waiting to be played; any more are dropped rather than wait for the mixer
+
+
+def headless():
+    return os.environ.get("SDL_VIDEODRIVER")=="dummy" or os.environ.get("SDL_AUDIODRIVER") in ("dummy", "disk")
+
+
+class Audio(object):
+
+    # sounds: event name -> sound files, one picked at random each time (relative to this directory)
+    # intervals: event name -> least seconds between its sounds, if not INTERVAL
+    def __init__(self,sounds,intervals=None,enabled=None,queue=QUEUE):
+        self.sounds = sounds
+        self.intervals = intervals or {}
+        self.enabled = not headless() if enabled is None else enabled
+        self.counts = defaultdict(int) # events since the last sound of each type
+        self.played = defaultdict(lambda: -float("inf"))
+        self.loaded = {} # decoded sounds, by file
+        self.queue = Queue(maxsize=queue)
+        self.player = None
+        self.random = random.Random()
+
+    # coalesce the events of a world's reactions after each of its steps
+    def attach(self,liquid):
+        if self.enabled:
+            liquid.observers.append(self)
+        return self
+
+    # an event of the given type, as from a reaction hook: only counted here
+    def event(self,name):
+        if self.enabled:
+            self.counts[name] += 1
+
+    def __call__(self,liquid):
+        if not self.counts:
+            return
+        now = perf_counter()
+        for name in list(self.counts):
+            if now-self.played[name]>=self.intervals.get(name, INTERVAL):
+                # one sound for all the events since the last
+                del self.counts[name]
+                self.played[name] = now
+                self.play(name)
+
+    # queue a sound for the playback thread, starting it if need be
+    def play(self,name,loops=0):
+        if not self.enabled:
+            return
+        if self.player is None:
+            self.player = threading.Thread(target=self.run, daemon=True)
+            self.player.start()
+        try:
+            self.queue.put_nowait((name, loops))
+        except Full:
+            pass
+
+    # the playback thread
+    def run(self):
+        import pygame
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+        except pygame.error:
+            self.enabled = False
+            return
+        while True:
+            name, loops = self.queue.get()
+            if name is None:
+                return
+            path = self.random.choice(self.sounds[name])
+            if path not in self.loaded:
+                self.loaded[path] = pygame.mixer.Sound(os.path.join(os.path.dirname(os.path.abspath(__file__)), path))
+            self.loaded[path].play(loops)
+
+    # stop the playback thread, after any sounds already queued
+    def close(self):
+        if self.player is not None and self.player.is_alive():
+            self.queue.put((None, 0))
+            self.player.join()
+            self.player = None
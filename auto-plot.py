@@ -5,75 +5,29 @@
 # conda activate pybox2d
 # python plot.py
 
-import pylab as p
-import numpy as np
-from time import time
 from auto import Autopoiesis
+from sampler import Sampler
+from plotsink import PlotSink
 from Box2D.examples.framework import main
 
 W = 20 # moving average 'window'
 SAMPLES = 100 # must be >= W
-
-plotS = []
-plotL = []
-plotJ = []
-plotX = []
-t0 = time()
-
-def moving_average(x, w):
-    return np.convolve(x, np.ones(w), 'valid') / w
+EVERY = 10 # samples between redraws of the figures
 
 class Plot(Autopoiesis):
     def __init__(self):
         super(Plot, self).__init__()
-        self.step = 0
-
-    def Step(self, settings):
-        global t0, plotS, plotL, plotJ, plotX
-        super(Plot, self).Step(settings)
-
-        # sample data once per second
-        if time()>t0+1:
-            t0 = time()
-            plotS.append(self.countS)
-            plotL.append(self.countL)
-            plotJ.append(self.countJ)
-            plotX.append(self.step)
-            self.step += 1
-            print(self.step)
-
-        if self.step==SAMPLES+W:
-            n = SAMPLES
-            t = plotX[:n]
-
-            # Fig 1. Plot S,L,J by time
-            fig1, ax1 = p.subplots()
-            ax2 = ax1.twinx()
-            ax1.plot(t, plotS[:n], label='substrate', color='red')
-            ax2.plot(t, plotL[:n], label='links', color='green')
-            ax2.plot(t, plotJ[:n], label='bonds', color='blue')
-            ax1.set_xlabel('time')
-            ax1.set_ylabel('substrate')
-            ax2.set_ylabel('links and bonds')
-            fig1.legend(loc='upper left')
-            p.grid()
-            fig1.savefig('images/fig1.png')
-
-            # Fig 2. Plot rate of change S,L,J by time
-            fig2 = p.figure()
-            s = moving_average(np.diff(plotS),W)
-            l = moving_average(np.diff(plotL),W)
-            j = moving_average(np.diff(plotJ),W)
-            p.plot(t, s[:n], 'r-', label='substrate')
-            p.plot(t, l[:n], 'g-', label='links')
-            p.plot(t, j[:n], 'b-', label='bonds')
-            p.legend(loc='best')
-            p.xlabel('time')
-            p.ylabel('rate of change ('+str(W)+' sec moving avg)')
-            p.grid()
-            fig2.savefig('images/fig2.png')
-
+        # figures are drawn in another process, from counts sampled once per simulated second
+        self.sink = PlotSink('images', every=EVERY, w=W)
+        self.sampler = Sampler(seconds=1, size=1).attach(self)
+        self.sampler.on(1, self.sink.update)
+        self.sampler.on(1, self.progress)
+
+    def progress(self, sampler):
+        print(sampler.total)
+        if sampler.total==SAMPLES+W:
+            self.sink.close()
             exit()
 
 if __name__ == "__main__":
-    main(Plot).run()
\ No newline at end of file
+    main(Plot).run()
@@ -5,209 +5,139 @@
 # To run:
 # conda activate pybox2d
 # python -m auto --backend=pygame
+#
+# Hold F to fast-forward: the world steps as fast as it can, undrawn, until F is released.
+
+# The world and reaction rules live in liquid.py (run that headless); this is the Framework GUI frontend.
 
-from inspect import _void
-from math import cos, sin, pi, sqrt, atan
-from scipy.stats import norm
-import random
 from time import time
 from Box2D.examples.framework import (Framework, Keys, main)
-from Box2D import *
-
-S_POP = 520
-
-# Arena dimensions/offsets
-OFFX = 0
-OFFY = 15
-SIDE = 30
-
-# body characteristics
-MASS = 5
-FRICTION = 0.2
-S_RADIUS = 0.5
-K_SIDE = 1.6
-L_SIDE = 0.9
-K_AREA = K_SIDE * sqrt(3)/4 # area of equilateral triangle
-S_AREA = pi * S_RADIUS**2 # area of circle
-L_AREA = L_SIDE**2 # area of square
-
-DECAY_RATE = 0.001
-CENTERING = 8
+from liquid import *
+from render import View, draw
 
-# Wiener Process parameter
-DELTA = 15
+# Rendering. With neither set, every step is drawn, as the Framework does. Otherwise physics keeps its
+# own fixed rate of settings.hz steps per second, and the view is redrawn only when one is due.
+RENDER_FPS = None # redraw at most this many times a second
+RENDER_EVERY = None # redraw every n steps
+CATCH_UP = 8 # most steps in one frame, when physics has fallen behind the clock
+BATCHED = True # draw particles and bonds as batches of cached sprites (render.py), not the Framework's per-shape debug draw
+FAST_FORWARD = "K_f" # held down, step without drawing (a Keys name: the backend fills in Keys when it starts)
 
-# A fixture binds a shape to a body and adds material properties such as density, friction, restitution. 
-# The components are ranked by increasing 'mass' as S, L, K.
 
-def triangle(r):
-    return [(r,0),(r*cos(4*pi/3),r*sin(4*pi/3)),(r*cos(2*pi/3),r*sin(2*pi/3))]
-
-# K - catalyst
-# S - substrate
-# L - link
-# BL - bonded link
-S = b2FixtureDef(shape=b2CircleShape(radius=S_RADIUS), density=MASS/S_AREA, friction=FRICTION, userData="S")
-L = b2FixtureDef(shape=b2PolygonShape(box=(L_SIDE,L_SIDE)), density=2*MASS/L_AREA, friction=FRICTION, userData="L")
-K = b2FixtureDef(shape=b2PolygonShape(vertices=triangle(K_SIDE)), density=3*MASS/K_AREA, friction=FRICTION, userData="K")
-
-
-class Autopoiesis(Framework):
+class Autopoiesis(Liquid, Framework):
     name = "Autopoiesis"
     description = "Simulated Autopoiesis in Liquid Automata"
-    bodies = []
-    joints = []
-
-    # the current set of catalyst contacts
-    contacts = set()
-    reserve = []
-    bonds = []
-
-    def __init__(self,n=S_POP):
-        global S,L,K
-        super(Autopoiesis, self).__init__()
-
-        self.countS = 0
-        self.countL = 0
-        self.countJ = 0
-        self.lastTime = time()
-        self.delta = DELTA # Wiener process
-
-        # weightless world
-        self.world.gravity = (0, 0)
-
-        # containment field
-        border = self.world.CreateStaticBody(
-            shapes=[b2EdgeShape(vertices=[(-SIDE/2+OFFX, -SIDE/2+OFFY), (SIDE/2+OFFX, -SIDE/2+OFFY)]),
-                    b2EdgeShape(vertices=[(-SIDE/2+OFFX, -SIDE/2+OFFY), (-SIDE/2+OFFX, SIDE/2+OFFY)]),
-                    b2EdgeShape(vertices=[(SIDE/2+OFFX, -SIDE/2+OFFY), (SIDE/2+OFFX, SIDE/2+OFFY)]),
-                    b2EdgeShape(vertices=[(-SIDE/2+OFFX, SIDE/2+OFFY), (SIDE/2+OFFX, SIDE/2+OFFY)]),
-                    ])
-
-        # The N body problem
-        self.bodies = [ self.world.CreateDynamicBody(position=(OFFX,OFFY),fixtures=K) ]
-        for i in range(n):
-            p = (random.randrange(round(-SIDE/2+OFFX+S_RADIUS*2),round(SIDE/2+OFFX-S_RADIUS*2)),
-                 random.randrange(round(-SIDE/2+OFFY+S_RADIUS*2),round(SIDE/2+OFFY-S_RADIUS*2)))
-            b = self.world.CreateDynamicBody(position=p,fixtures=S)
-            b.angle = random.uniform(0,2*pi)
-            self.bodies.append(b)
-            self.countS += 1
-
-        bodies = self.bodies
-
-    # eliminates triangular compositions
-    def acute(self,bodyA,bodyB):
-        a = [i.bodyB for i in self.joints if i.bodyA==bodyA] + \
-            [j.bodyA for j in self.joints if j.bodyB==bodyA]
-        b = [i.bodyB for i in self.joints if i.bodyA==bodyB] + \
-            [j.bodyA for j in self.joints if j.bodyB==bodyB]
-        # list intersection - any body joined to both A and B
-        intersect = [i for i in a if i in b]
-        return len(intersect)>0
-
-    def Step(self, settings):
-        global S, L, lastTime, countS, countL, countJ
-        super(Autopoiesis, self).Step(settings)
-
-        # determine dt using the clock
-        timeNow = time()
-        dt = timeNow - self.lastTime
-        self.lastTime = timeNow
-
-        for body in self.bodies:
-            if len(body.fixtures)==1:
-                # Apply random 'brownian' forces (Wiener process) to substrate at each step
-                # see https://scipy-cookbook.readthedocs.io/items/BrownianMotion.html
-                force = (norm.rvs(scale=self.delta**2*dt), norm.rvs(scale=self.delta**2*dt))
-                body.ApplyLinearImpulse(force,body.position, True)
-                    
-                # catalyst pressure towards origin to avoid being trapped against the wall
-                if body.fixtures[0].userData=="K":
-                    force = (-CENTERING*(body.position[0]-OFFX),-CENTERING*(body.position[1]-OFFY))
-                    body.ApplyForce(force,body.position, True)
-        
-        # composition: K + 2S -> K + L
-        # convert substrate pair to link
-        if len(self.contacts)>=2:
-            # convert the first substrate into a link
-            c = self.contacts.pop()
-            c.DestroyFixture(c.fixtures[0])
-            c.CreateFixture(L)
-            c.userData = 0 # bond counter
-            # put the second substrate on the reserve list (we need it for decay)
-            c1 = self.contacts.pop()
-            c1.DestroyFixture(c1.fixtures[0])
-            self.reserve.append(c1)
-            self.countS -= 2
-            self.countL += 1
-
-        # concatenation: L<super>n</super> + L -> L<super>n+1</super>
-        # bond links together
-        for b in self.bonds:
-            bodyA = b.fixtureA.body
-            bodyB = b.fixtureB.body
-            if b.fixtureA.userData=="L" and bodyA.userData<2 and \
-               b.fixtureB.userData=="L" and bodyB.userData<2 and not(self.acute(bodyA,bodyB)):
-                j = self.world.CreateJoint(b2DistanceJointDef(
-                    frequencyHz=4.0, dampingRatio=0.5,
-                    bodyA=bodyA, bodyB=bodyB,
-                    localAnchorA=(0,0), localAnchorB=(0,0)
-                ))
-                self.joints.append(j)
-                bodyA.userData += 1
-                bodyB.userData += 1
-                self.countJ += 1
-        self.bonds = []
-
-        # disintegration:  L -> 2S
-        # random decay of links and bonds
-        for b in self.bodies:
-            # links have a single fixture with userData = "L"
-            if len(b.fixtures)==1 and b.fixtures[0].userData=="L":
-                if random.uniform(0,1) < DECAY_RATE:
-                    # destroy the link fixture and replace it with a substrate fixture
-                    b.DestroyFixture(b.fixtures[0])
-                    b.CreateFixture(S)
-                    # now delete any associated joints
-                    joints2go = []
-                    for j in self.joints:
-                        if j.bodyA == b or j.bodyB == b:
-                            joints2go.append(j)
-                    for j in joints2go:
-                        if j.bodyA == b and isinstance(j.bodyB.userData, int):
-                            j.bodyB.userData -= 1
-                        if j.bodyB == b and isinstance(j.bodyA.userData, int):
-                            j.bodyA.userData -= 1
-                        self.joints.remove(j)
-                        self.world.DestroyJoint(j)
-                        self.countJ -= 1
-
-                    # restore the second substrate from the reserve
-                    s = self.reserve.pop()
-                    s.CreateFixture(S)
-                    s.position = b.position
-                    self.countL -= 1
-                    self.countS += 2
-
-    def BeginContact(self,contact):
-        # Add new catalyst contacts (removed in EndContact below)
-        if contact.fixtureA.userData=="K" and contact.fixtureB.userData=="S":
-            self.contacts.add(contact.fixtureB.body)
-        elif contact.fixtureB.userData=="K" and contact.fixtureA.userData=="S":
-            self.contacts.add(contact.fixtureA.body)
-
-        # Add new bond
-        if contact.fixtureA.userData=="L" and contact.fixtureA.body.userData<2 and \
-           contact.fixtureB.userData=="L" and contact.fixtureB.body.userData<2:
-            self.bonds.append(contact)
-
-    def EndContact(self,contact):
-        # The bodies may have already been removed by catalysis
-        if contact.fixtureA.userData=="K" and contact.fixtureB.body in self.contacts:
-            self.contacts.remove(contact.fixtureB.body)
-        elif contact.fixtureB.userData=="K" and contact.fixtureB.body in self.contacts:
-            self.contacts.remove(contact.fixtureA.body)
+
+    def __init__(self,n=S_POP,delta=DELTA,seed=None,k=1,fps=RENDER_FPS,every=RENDER_EVERY,batched=BATCHED,side=SIDE):
+        # Framework.__init__ (via Liquid) creates the world and opens the window
+        super(Autopoiesis, self).__init__(n,delta=delta,seed=seed,k=k,side=side)
+        if side>SIDE:
+            # a larger arena, for a larger population: zoom out to fit it in the window
+            self.viewZoom = min(self.viewZoom, 0.95*min(self.screenSize)/side)
+            self.viewCenter = (OFFX, OFFY)
+        self.batched = batched
+        self.view = None # the render.View, rebuilt when the zoom changes
+        if batched:
+            # the Framework still draws its text, the mouse joint and contact points
+            self.settings.drawShapes = False
+            self.settings.drawJoints = False
+        self.renderFPS = fps
+        self.renderEvery = every
+        self.fastForward = False
+        self.drawing = True # whether this step is drawn (see Physics)
+        self.frame = None # the screen as last drawn, shown again between redraws
+        self.drawnAt = (0.0, 0) # wall time and step of the last redraw
+        self.clock = None # wall time and step physics is timed from
+
+    def Keyboard(self, key):
+        if key==getattr(Keys, FAST_FORWARD):
+            self.fastForward = True
+            self.frame = self.screen.copy() # still showing the last frame drawn
+
+    def KeyboardUp(self, key):
+        if key==getattr(Keys, FAST_FORWARD):
+            self.fastForward = False
+            self.clock = None # carry on at the fixed rate from here, rather than catching up
+
+    # one frame of the Framework's loop
+    def Step(self, settings=None):
+        # paused, or single stepping (which only the Framework's step ends): one drawn step at most
+        if settings.pause or (not self.fastForward and self.renderFPS is None and self.renderEvery is None):
+            self.clock = None
+            self.drawing = True
+            return super(Autopoiesis, self).Step(settings)
+
+        now = time()
+        if self.fastForward:
+            # as many steps as fit in a frame at settings.hz, none of them drawn
+            end = now + 1.0/settings.hz
+            while True:
+                self.drawing = False
+                super(Autopoiesis, self).Step(settings)
+                if time()>=end:
+                    break
+            self.redraw()
+            self.Print("**FAST FORWARD** time %.0f" % self.time, (200, 200, 0))
+            return
+
+        # the steps due by the clock at settings.hz, so physics keeps its rate whatever drawing costs
+        if self.clock is None:
+            self.clock = (now-1.0/settings.hz, self.steps) # a step due straight away
+        due = int(round((now-self.clock[0])*settings.hz)) - (self.steps-self.clock[1])
+        if due>CATCH_UP:
+            # too far behind to catch up: slow down, timing afresh from the steps of this frame
+            self.clock = (now, self.steps+CATCH_UP)
+            due = CATCH_UP
+        for i in range(due):
+            last = i==due-1
+            self.drawing = last and (self.frame is None or self.due(now, self.steps+1))
+            super(Autopoiesis, self).Step(settings)
+        if not self.drawing or due<1:
+            self.redraw()
+
+    # whether the view is due to be redrawn at wall time now, at the given step
+    def due(self, now, step):
+        if self.renderFPS is not None and now-self.drawnAt[0]>=1.0/self.renderFPS:
+            return True
+        return self.renderEvery is not None and step-self.drawnAt[1]>=self.renderEvery
+
+    # show the frame last drawn again, over the Framework's cleared screen
+    def redraw(self):
+        if self.frame is not None:
+            self.screen.blit(self.frame, (0, 0))
+
+    # draw the world from its snapshot, through the Framework's current view
+    def render(self):
+        center, size = tuple(self.viewCenter), tuple(int(x) for x in self.screenSize)
+        if self.view is None or self.view.zoom!=self.viewZoom:
+            self.view = View(size, self.side, center, self.viewZoom, arena=(OFFX, OFFY))
+        self.view.center, self.view.size = center, size
+        draw(self.screen, self.snapshot(velocity=False), self.view, clear=False)
+
+    # the Framework steps (and draws) the world at the fixed rate settings.hz
+    def Physics(self, settings):
+        paused = settings.pause and not settings.singleStep
+        if not self.drawing and not paused:
+            self.dt = 1.0/settings.hz
+            self.world.Step(self.dt, settings.velocityIterations, settings.positionIterations)
+            self.world.ClearForces()
+            return self.dt
+        Framework.Step(self, settings)
+        rendered = 0.0
+        if self.batched and self.renderer:
+            rendered = time()
+            self.render()
+            rendered = time() - rendered
+        if self.renderFPS is not None or self.renderEvery is not None:
+            self.drawnAt = (time(), self.steps+1)
+            self.frame = self.screen.copy()
+        # the Framework times its own drawing: count that as rendering rather than physics
+        if self.profile is not None and self.renderer and self.t_draws:
+            self.profile.move("physics", "render", 1.0/self.t_draws[-1] + rendered)
+        if paused or settings.hz<=0:
+            return 0.0
+        self.dt = 1.0/settings.hz
+        return self.dt
 
 
 if __name__ == "__main__":
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+# Simulated Autopoiesis in Liquid Automata
+# Steps-per-second benchmarks for the liquid automaton, run headless.
+# Each world in the grid runs in a fresh process so that peak memory is its own.
+# Results are written as JSON, and may be compared with an earlier results file.
+
+# To run:
+# python bench.py --output bench.json
+# python bench.py --quick --compare bench.json
+
+import argparse
+import json
+import multiprocessing as mp
+import platform
+import resource
+import subprocess
+from datetime import datetime, timezone
+from math import sqrt
+from time import perf_counter
+import numpy as np
+import Box2D
+from liquid import Liquid, S_POP, SIDE, DELTA
+
+POPS = [250, 520, 1000, 2500, 5000]
+CATALYSTS = [1, 4]
+DELTAS = [10, 15, 20]
+WARMUP = 300 # steps before timing starts
+STEPS = 1000 # timed steps
+REPS = 200 # microbenchmark repetitions
+
+# larger populations get a larger arena, at the density of the default S_POP in SIDE x SIDE
+def arena(pop):
+    return SIDE*sqrt(max(pop,S_POP)/S_POP)
+
+def world(pop,k=1,delta=DELTA,seed=0):
+    return Liquid(pop, k=k, delta=delta, seed=seed, side=arena(pop))
+
+def percentiles(times):
+    return {"p50": float(np.percentile(times,50)), "p90": float(np.percentile(times,90)),
+            "p99": float(np.percentile(times,99)), "max": float(np.max(times))}
+
+# time every step of one world, in a process of its own
+def macro(config):
+    pop, k, delta, warmup, steps = config
+    liquid = world(pop, k, delta)
+    liquid.simulate(warmup)
+    times = np.empty(steps)
+    for i in range(steps):
+        t = perf_counter()
+        liquid.Step()
+        times[i] = perf_counter() - t
+    result = {"pop": pop, "catalysts": k, "delta": delta, "steps": steps,
+              "steps_per_sec": steps/float(np.sum(times)),
+              "latency_ms": {p: v*1000 for p, v in percentiles(times).items()},
+              "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024,
+              "S": liquid.countS, "L": liquid.countL, "J": liquid.countJ}
+    return result
+
+def clock(f, times, i):
+    t = perf_counter()
+    f()
+    times[i] = perf_counter() - t
+
+# time the contact polling, the Brownian forcing and each reaction rule in isolation on a warmed world
+def micro(config):
+    pop, warmup, reps = config
+    liquid = world(pop)
+    liquid.simulate(warmup)
+    times = {name: np.empty(reps) for name in ("physics", "react", "brownian", "concatenate")}
+    # two links are composed and decomposed each repetition, each timed on its own
+    times.update(compose=np.empty(2*reps), decompose=np.empty(2*reps))
+    for i in range(reps):
+        clock(lambda: liquid.Physics(None), times["physics"], i)
+        clock(liquid.react, times["react"], i)
+        liquid.bonds = []
+        clock(lambda: liquid.brownian(liquid.dt), times["brownian"], i)
+
+        # compose two free links from any substrate, bond them, then break both down again
+        substrate = list(liquid.substrate)
+        links = []
+        for j, (c, c1) in enumerate((substrate[-2:], substrate[-4:-2])):
+            clock(lambda: links.append(liquid.compose(c,c1)), times["compose"], 2*i+j)
+        clock(lambda: liquid.acute(*links) or liquid.bond(*links), times["concatenate"], i)
+        for j, link in enumerate(links):
+            clock(lambda: liquid.decompose(link), times["decompose"], 2*i+j)
+    liquid.check()
+    names = ("physics", "react", "brownian", "compose", "concatenate", "decompose")
+    return {"pop": pop, "reps": reps,
+            "latency_us": {name: {p: v*1e6 for p, v in percentiles(times[name]).items()} for name in names}}
+
+def revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline):
+    key = lambda r: (r["pop"], r["catalysts"], r["delta"])
+    before = {key(r): r for r in baseline["results"]}
+    print()
+    print("compared with {} ({})".format(baseline.get("revision"), baseline.get("date")))
+    print("pop\tK\tdelta\tsteps/s\tbefore\tratio")
+    for r in results:
+        if key(r) in before:
+            b = before[key(r)]["steps_per_sec"]
+            print("{}\t{}\t{}\t{:.1f}\t{:.1f}\t{:.2f}x".format(*key(r), r["steps_per_sec"], b, r["steps_per_sec"]/b))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark steps/sec of the liquid automaton")
+    parser.add_argument("--pops", type=int, nargs="+", default=POPS, help="substrate populations")
+    parser.add_argument("--catalysts", type=int, nargs="+", default=CATALYSTS, help="catalyst populations")
+    parser.add_argument("--deltas", type=float, nargs="+", default=DELTAS, help="Wiener process parameters")
+    parser.add_argument("--warmup", type=int, default=WARMUP)
+    parser.add_argument("--steps", type=int, default=STEPS)
+    parser.add_argument("--reps", type=int, default=REPS, help="microbenchmark repetitions")
+    parser.add_argument("--quick", action="store_true", help="a small grid, for a fast check")
+    parser.add_argument("--output", default="bench.json", help="results file")
+    parser.add_argument("--compare", default=None, help="an earlier results file to compare with")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.pops, args.catalysts, args.deltas = [250, 1000], [1], [DELTA]
+        args.warmup, args.steps, args.reps = 100, 300, 50
+
+    # read the baseline first, as it may well be the file these results are about to replace
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    grid = [(pop, k, delta, args.warmup, args.steps)
+            for pop in args.pops for k in args.catalysts for delta in args.deltas]
+    results = []
+    micros = []
+    # one process per world, one world at a time
+    with mp.Pool(1, maxtasksperchild=1) as pool:
+        print("pop\tK\tdelta\tsteps/s\tp50 ms\tp99 ms\tpeak MB")
+        for r in pool.imap(macro, grid):
+            results.append(r)
+            print("{}\t{}\t{}\t{:.1f}\t{:.2f}\t{:.2f}\t{:.0f}".format(r["pop"], r["catalysts"], r["delta"],
+                  r["steps_per_sec"], r["latency_ms"]["p50"], r["latency_ms"]["p99"], r["peak_rss_mb"]))
+        print()
+        print("pop\t" + "\t".join("{} us".format(name) for name in
+              ("physics", "react", "brownian", "compose", "concat.", "decomp.")))
+        for m in pool.imap(micro, [(pop, args.warmup, args.reps) for pop in args.pops]):
+            micros.append(m)
+            print("{}\t".format(m["pop"]) + "\t".join("{:.1f}".format(t["p50"]) for t in m["latency_us"].values()))
+
+    report = {"date": datetime.now(timezone.utc).isoformat(), "revision": revision(),
+              "python": platform.python_version(), "box2d": Box2D.__version__, "machine": platform.platform(),
+              "processor": platform.processor(), "results": results, "micro": micros}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print("results written to {}".format(args.output))
+
+    if baseline is not None:
+        compare(results, baseline)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+# Simulated Autopoiesis in Liquid Automata
+# Run independent, seeded replicas of the liquid automaton across all cores, streaming their
+# S, L, J time series back and aggregating them into a mean and confidence band.
+
+# To run:
+# python ensemble.py --replicas 30 --steps 36000
+
+import argparse
+import multiprocessing as mp
+from queue import Empty
+import numpy as np
+from scipy.stats import t as student
+from liquid import Liquid, HZ
+
+REPLICAS = 30
+STEPS = 36000 # 10 minutes of simulated time at 60Hz
+EVERY = 60 # sample once per simulated second
+
+# the queue workers stream samples back on, set up by the pool initializer
+samples = None
+
+def init(queue):
+    global samples
+    samples = queue
+
+# run one replica, streaming (replica, sample, time, S, L, J) after every sample
+def replica(task):
+    index, seed, steps, every, start, world = task
+    # a fresh world, or one forked from a checkpoint
+    liquid = Liquid(seed=seed, **world) if start is None else Liquid.restore(start, seed=seed)
+    for i in range(steps//every):
+        liquid.simulate(every)
+        samples.put((index, i, liquid.time, liquid.countS, liquid.countL, liquid.countJ))
+    return index
+
+
+class Ensemble(object):
+
+    def __init__(self,replicas=REPLICAS,steps=STEPS,every=EVERY,seed=None,processes=None,start=None,worlds=None,**world):
+        self.replicas = replicas
+        self.steps = steps
+        self.every = every
+        self.start = start # a checkpoint every replica starts from, in place of a fresh world
+        self.processes = processes or min(replicas, mp.cpu_count())
+        self.world = world # Liquid keyword arguments, e.g. n, delta, k
+        # each replica's own keyword arguments, over those shared (e.g. a DELTA per replica)
+        self.worlds = [dict(world, **w) for w in worlds] if worlds else [world]*replicas
+        # independent seeds for each replica, reproducible from the ensemble seed
+        self.seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(replicas)]
+
+        n = steps//every
+        self.T = np.arange(1,n+1)*every/world.get('hz',HZ) # time since the start
+        self.S = np.full((replicas,n), np.nan)
+        self.L = np.full((replicas,n), np.nan)
+        self.J = np.full((replicas,n), np.nan)
+
+    # run the replicas in a process pool, yielding each sample as it arrives
+    def stream(self):
+        queue = mp.Queue()
+        tasks = [(i, self.seeds[i], self.steps, self.every, self.start, self.worlds[i]) for i in range(self.replicas)]
+        with mp.Pool(self.processes, initializer=init, initargs=(queue,)) as pool:
+            result = pool.map_async(replica, tasks)
+            remaining = self.replicas * self.S.shape[1]
+            while remaining>0:
+                try:
+                    index, i, time, s, l, j = queue.get(timeout=1)
+                except Empty:
+                    if result.ready():
+                        result.get() # re-raise a failed replica
+                        break
+                    continue
+                self.S[index,i] = s
+                self.L[index,i] = l
+                self.J[index,i] = j
+                remaining -= 1
+                yield index, i, time, s, l, j
+            result.get()
+
+    # run to completion
+    def run(self):
+        for sample in self.stream():
+            pass
+        return self
+
+    # mean and confidence band across replicas, per sample, for each of S, L, J
+    def bands(self,confidence=0.95):
+        bands = {}
+        for name, data in (("S",self.S),("L",self.L),("J",self.J)):
+            n = np.sum(~np.isnan(data), axis=0)
+            mean = np.nanmean(data, axis=0)
+            sem = np.nanstd(data, axis=0, ddof=1) / np.sqrt(n)
+            h = sem * student.ppf((1+confidence)/2, n-1)
+            bands[name] = (mean, mean-h, mean+h)
+        return bands
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run seeded replicas of the liquid automaton in parallel")
+    parser.add_argument("--replicas", type=int, default=REPLICAS)
+    parser.add_argument("--steps", type=int, default=STEPS, help="simulation steps per replica")
+    parser.add_argument("--every", type=int, default=EVERY, help="sample S, L, J every n steps")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--pop", type=int, default=None, help="substrate population")
+    parser.add_argument("--delta", type=float, default=None, help="Wiener process parameter")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--start", default=None, help="fork every replica from this checkpoint (.npz)")
+    parser.add_argument("--output", default=None, help="save the time series and bands to this .npz file")
+    args = parser.parse_args()
+
+    world = {}
+    if args.pop is not None:
+        world['n'] = args.pop
+    if args.delta is not None:
+        world['delta'] = args.delta
+
+    ensemble = Ensemble(args.replicas, args.steps, args.every, seed=args.seed, processes=args.processes,
+                        start=args.start, **world)
+    done = 0
+    for index, i, time, s, l, j in ensemble.stream():
+        if i==ensemble.S.shape[1]-1:
+            done += 1
+            print("replica {} done ({}/{}): S={} L={} J={}".format(index, done, ensemble.replicas, s, l, j))
+
+    bands = ensemble.bands()
+    print("time\tS\t95% CI\t\tL\t95% CI\t\tJ\t95% CI")
+    for i in range(0, len(ensemble.T), max(1, len(ensemble.T)//20)):
+        print("{:.1f}".format(ensemble.T[i]) + "".join(
+            "\t{:.2f}\t{:.2f}-{:.2f}".format(mean[i],lo[i],hi[i]) for mean, lo, hi in bands.values()))
+
+    if args.output:
+        np.savez(args.output, T=ensemble.T, S=ensemble.S, L=ensemble.L, J=ensemble.J,
+                 **{name+suffix: band[k] for name, band in bands.items() for k, suffix in enumerate(("mean","lo","hi"))})
@@ -0,0 +1,733 @@
+#!/usr/bin/env python
+
+# Simulated Autopoiesis in Liquid Automata
+# The liquid automaton without a frontend: the Box2D world, its particles and the reaction rules.
+# Time is simulation time, advanced by a fixed dt, so runs are independent of machine load.
+
+# To run headless:
+# python liquid.py --steps 36000
+
+import argparse
+from collections import defaultdict
+import heapq
+from itertools import count
+import json
+import sys
+from time import perf_counter
+from math import cos, sin, pi, sqrt
+import numpy as np
+import random
+from Box2D import *
+
+S_POP = 520
+
+# Arena dimensions/offsets
+OFFX = 0
+OFFY = 15
+SIDE = 30
+
+# body characteristics
+MASS = 5
+FRICTION = 0.2
+S_RADIUS = 0.5
+K_SIDE = 1.6
+L_SIDE = 0.9
+K_AREA = K_SIDE * sqrt(3)/4 # area of equilateral triangle
+S_AREA = pi * S_RADIUS**2 # area of circle
+L_AREA = L_SIDE**2 # area of square
+
+# where pooled (deactivated) bodies are kept, far out of view: the debug draw still draws inactive bodies
+PARK = (OFFX, OFFY-1e4)
+
+DECAY_RATE = 0.001 # probability per step that a link disintegrates
+CENTERING = 8
+
+# Wiener Process parameter
+DELTA = 15
+
+# Fixed simulation timestep (the Framework default of 60Hz) and solver iterations
+HZ = 60.0
+VELOCITY_ITERATIONS = 8
+POSITION_ITERATIONS = 3
+
+# A fixture binds a shape to a body and adds material properties such as density, friction, restitution.
+# The components are ranked by increasing 'mass' as S, L, K.
+
+def triangle(r):
+    return [(r,0),(r*cos(4*pi/3),r*sin(4*pi/3)),(r*cos(2*pi/3),r*sin(2*pi/3))]
+
+# K - catalyst
+# S - substrate
+# L - link
+# BL - bonded link
+S = b2FixtureDef(shape=b2CircleShape(radius=S_RADIUS), density=MASS/S_AREA, friction=FRICTION, userData="S")
+L = b2FixtureDef(shape=b2PolygonShape(box=(L_SIDE,L_SIDE)), density=2*MASS/L_AREA, friction=FRICTION, userData="L")
+K = b2FixtureDef(shape=b2PolygonShape(vertices=triangle(K_SIDE)), density=3*MASS/K_AREA, friction=FRICTION, userData="K")
+
+
+# particle types, as numbered in checkpoints
+KINDS = {"K": 0, "S": 1, "L": 2}
+FIXTURES = [K, S, L]
+CHECKPOINT = 1 # checkpoint format version
+
+# Cumulative time, calls and reactions for each phase of Liquid.Step, while attached as liquid.profile.
+# Reports are available at any time from report(), and are printed every n steps if asked.
+class Profile(object):
+
+    def __init__(self,every=None,file=sys.stdout):
+        self.every = every
+        self.file = file
+        self.steps = 0
+        self.time = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.reactions = defaultdict(int)
+
+    # add the time since t to a phase, returning the time now
+    def lap(self,phase,t,reactions=0):
+        now = perf_counter()
+        self.time[phase] += now - t
+        self.calls[phase] += 1
+        self.reactions[phase] += reactions
+        return now
+
+    # reattribute time measured in one phase to another (e.g. rendering within the Framework step)
+    def move(self,source,phase,seconds):
+        self.time[source] -= seconds
+        self.time[phase] += seconds
+        self.calls[phase] += 1
+
+    def step(self):
+        self.steps += 1
+        if self.every and self.steps%self.every==0:
+            print(self, file=self.file)
+
+    # phase -> total seconds, mean microseconds per call, share of the total, reactions
+    def report(self):
+        total = sum(self.time.values()) or 1.0
+        return {phase: {"seconds": t, "mean_us": t/self.calls[phase]*1e6, "share": t/total,
+                        "calls": self.calls[phase], "reactions": self.reactions[phase]}
+                for phase, t in self.time.items()}
+
+    def __str__(self):
+        lines = ["{} steps\tseconds\tmean us\tshare\treactions".format(self.steps)]
+        for phase, r in self.report().items():
+            lines.append("{}\t{:.3f}\t{:.1f}\t{:.1%}\t{}".format(phase, r["seconds"], r["mean_us"], r["share"], r["reactions"]))
+        return "\n".join(lines)
+
+
+# The membrane's topology: links joined by bonds form chains, or closed rings.
+# A link has at most two bonds, so each component is a simple chain or ring; components are kept
+# up to date as bonds are made and broken, touching only the links of the components involved.
+class Membrane(object):
+
+    def __init__(self):
+        self.component = {} # link -> its component's key
+        self.members = {} # component key -> its links (dict as an ordered set)
+        self.rings = {} # component key -> the links of a closed ring, in order around it
+        self.keys = count()
+        self.closures = 0 # rings closed
+
+    # a new, unbonded link
+    def add(self,link):
+        key = next(self.keys)
+        self.component[link] = key
+        self.members[key] = {link: None}
+
+    # a link gone from the world, once unbonded
+    def discard(self,link):
+        del self.members[self.component.pop(link)]
+
+    # after bonding A and B: merge their chains, or close a ring, returning it
+    def join(self,bodyA,bodyB,bonded):
+        a, b = self.component[bodyA], self.component[bodyB]
+        if a==b:
+            self.rings[a] = self.walk(bodyA, bonded)
+            self.closures += 1
+            return self.rings[a]
+        if len(self.members[a])<len(self.members[b]):
+            a, b = b, a
+        for link in self.members[b]:
+            self.component[link] = a
+        self.members[a].update(self.members.pop(b))
+        return None
+
+    # after every bond to a link is broken: it is left on its own, opening its ring
+    # or splitting its chain in two
+    def cut(self,link,partners,bonded):
+        key = self.component[link]
+        if len(partners)==0:
+            return
+        del self.members[key][link]
+        if self.rings.pop(key, None) is None and len(partners)==2:
+            split = next(self.keys)
+            self.members[split] = {}
+            for b in self.walk(partners[1], bonded):
+                del self.members[key][b]
+                self.members[split][b] = None
+                self.component[b] = split
+        self.add(link)
+
+    # the links in order from a link along its bonds, until the chain ends or comes back round
+    def walk(self,start,bonded):
+        path = [start]
+        previous, body = None, start
+        while True:
+            ahead = [b for b in bonded[body] if b!=previous]
+            if not ahead or ahead[0]==start:
+                return path
+            previous, body = body, ahead[0]
+            path.append(body)
+
+    # the closed ring a link belongs to, if any
+    def ring(self,link):
+        return self.rings.get(self.component[link])
+
+    # whether each body lies inside a closed ring (even-odd rule against the polygon through its links' centres)
+    def enclosed(self,bodies):
+        inside = np.zeros(len(bodies), dtype=bool)
+        if not self.rings or not bodies:
+            return inside
+        points = np.array([tuple(b.position) for b in bodies])
+        x, y = points[:,0:1], points[:,1:2]
+        for ring in self.rings.values():
+            p = np.array([tuple(b.position) for b in ring])
+            q = np.roll(p, -1, axis=0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                crossing = ((p[:,1]>y) != (q[:,1]>y)) & (x < p[:,0] + (y-p[:,1])*(q[:,0]-p[:,0])/(q[:,1]-p[:,1]))
+            inside |= crossing.sum(axis=1)%2==1
+        return inside
+
+    # per-step structural metrics: chains (of two or more links) and free links, closed rings with
+    # their sizes, the longest component, rings closed so far, and the catalysts enclosed by a ring
+    def metrics(self,catalysts=()):
+        sizes = [len(m) for key, m in self.members.items() if key not in self.rings]
+        rings = sorted((len(r) for r in self.rings.values()), reverse=True)
+        return {"chains": sum(1 for n in sizes if n>1), "free": sizes.count(1),
+                "rings": len(rings), "ring_sizes": rings, "longest": max(sizes+rings, default=0),
+                "closures": self.closures, "enclosed": int(self.enclosed(list(catalysts)).sum())}
+
+
+class Liquid(object):
+    # A frontend (e.g. the Framework in auto.py) may be mixed in after Liquid, in which case
+    # it creates the world and owns the physics step (see Physics below).
+
+    def __init__(self,n=S_POP,delta=DELTA,hz=HZ,seed=None,k=1,decay=DECAY_RATE,continuous=False,side=SIDE):
+        super(Liquid, self).__init__()
+
+        # headless: create our own world
+        if getattr(self, 'world', None) is None:
+            self.world = b2World(doSleep=True)
+
+        # Reactive contacts are polled from the catalysts' and links' own contact edges (see react),
+        # so no contact listener is needed and S-S and wall contacts never call back into Python
+        self.world.contactListener = None
+
+        self.bodies = []
+        # live registries by particle type (dicts as insertion-ordered sets)
+        self.catalysts = []
+        self.substrate = {}
+        self.links = {}
+        self.joints = set()
+        # bond adjacency: link body -> {bonded partner: joint}
+        self.bonded = {}
+        # chains and rings of bonded links
+        self.membrane = Membrane()
+        # the substrate currently in contact with each catalyst
+        self.contacts = {}
+        # deactivated bodies, outside the broad-phase and the step: a substrate pair is
+        # held in reserve for each link, and decayed links are kept spare for reuse
+        self.reserve = []
+        self.spare = []
+        # new L-L contacts, and the L-L pairs touching after the last step
+        self.bonds = []
+        self.touching = set()
+
+        self.countS = 0
+        self.countL = 0
+        self.countJ = 0
+        self.delta = delta # Wiener process
+        self.dt = 1.0/hz
+        self.time = 0.0 # simulation time
+        self.steps = 0
+        # cumulative reaction totals
+        self.composed = 0
+        self.concatenated = 0
+        self.decomposed = 0
+        self.profile = None # a Profile, to instrument each Step
+        # callables observer(liquid), called after each step (e.g. recorder.Recorder)
+        self.observers = []
+        # preallocated arrays filled by snapshot, and each body's index in self.bodies
+        self.buffers = {}
+        self.ids = {}
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed) # Wiener process and decay
+
+        # links decay with probability decay per step, or at the equivalent rate decay*hz in continuous time
+        self.decay = decay
+        self.continuous = continuous
+        # decay schedule, a heap of [due step or time, sequence, link]
+        # entries for links decomposed out of turn are marked removed (link None)
+        self.decays = []
+        self.scheduled = {} # link -> its entry
+        self.sequence = count()
+
+        # weightless world
+        self.world.gravity = (0, 0)
+
+        self.contain(side)
+
+        # The N body problem
+        # a lone catalyst starts at the centre, several are scattered at random
+        for i in range(k):
+            p = (OFFX,OFFY) if k==1 else \
+                (self.random.randrange(round(-side/2+OFFX+S_RADIUS*2),round(side/2+OFFX-S_RADIUS*2)),
+                 self.random.randrange(round(-side/2+OFFY+S_RADIUS*2),round(side/2+OFFY-S_RADIUS*2)))
+            b = self.world.CreateDynamicBody(position=p,fixtures=K)
+            self.bodies.append(b)
+            self.catalysts.append(b)
+        for i in range(n):
+            p = (self.random.randrange(round(-side/2+OFFX+S_RADIUS*2),round(side/2+OFFX-S_RADIUS*2)),
+                 self.random.randrange(round(-side/2+OFFY+S_RADIUS*2),round(side/2+OFFY-S_RADIUS*2)))
+            b = self.world.CreateDynamicBody(position=p,fixtures=S)
+            b.angle = self.random.uniform(0,2*pi)
+            self.bodies.append(b)
+            self.substrate[b] = None
+            self.countS += 1
+
+    # containment field
+    def contain(self,side):
+        self.side = side
+        self.border = self.world.CreateStaticBody(
+            shapes=[b2EdgeShape(vertices=[(-side/2+OFFX, -side/2+OFFY), (side/2+OFFX, -side/2+OFFY)]),
+                    b2EdgeShape(vertices=[(-side/2+OFFX, -side/2+OFFY), (-side/2+OFFX, side/2+OFFY)]),
+                    b2EdgeShape(vertices=[(side/2+OFFX, -side/2+OFFY), (side/2+OFFX, side/2+OFFY)]),
+                    b2EdgeShape(vertices=[(-side/2+OFFX, side/2+OFFY), (side/2+OFFX, side/2+OFFY)]),
+                    ])
+
+    # the counters must agree with the registries
+    def check(self):
+        assert self.countS==len(self.substrate), "countS {} != {} substrate".format(self.countS,len(self.substrate))
+        assert self.countL==len(self.links)==len(self.reserve)//2, "countL {} != {} links".format(self.countL,len(self.links))
+        assert self.countJ==len(self.joints), "countJ {} != {} joints".format(self.countJ,len(self.joints))
+        assert len(self.membrane.component)==len(self.links), "membrane {} != {} links".format(len(self.membrane.component),len(self.links))
+
+    # eliminates triangular compositions
+    def acute(self,bodyA,bodyB):
+        # any body joined to both A and B
+        return not self.bonded[bodyA].keys().isdisjoint(self.bonded[bodyB])
+
+    # bond two links, maintaining the adjacency index and the membrane
+    def bond(self,bodyA,bodyB):
+        j = self.world.CreateJoint(b2DistanceJointDef(
+            frequencyHz=4.0, dampingRatio=0.5,
+            bodyA=bodyA, bodyB=bodyB,
+            localAnchorA=(0,0), localAnchorB=(0,0)
+        ))
+        self.joints.add(j)
+        self.bonded[bodyA][bodyB] = j
+        self.bonded[bodyB][bodyA] = j
+        bodyA.userData += 1
+        bodyB.userData += 1
+        self.membrane.join(bodyA,bodyB,self.bonded)
+        self.countJ += 1
+        self.concatenated += 1
+        return j
+
+    # destroy every bond to a link, returning the partners it was bonded to
+    def unbond(self,body):
+        partners = self.bonded[body]
+        for b, j in partners.items():
+            del self.bonded[b][body]
+            b.userData -= 1
+            self.joints.remove(j)
+            self.world.DestroyJoint(j)
+            self.countJ -= 1
+        self.bonded[body] = {}
+        partners = list(partners)
+        self.membrane.cut(body,partners,self.bonded)
+        return partners
+
+    # gather the contacts the rules react to: substrate touching each catalyst, and links that
+    # have come into contact since the last step (as BeginContact would report them)
+    def react(self):
+        for k in self.catalysts:
+            self.contacts[k] = [edge.other for edge in k.contacts_gen
+                                if edge.other in self.substrate and edge.contact.touching]
+
+        touching = set()
+        for a in self.links:
+            for edge in a.contacts_gen:
+                b = edge.other
+                if b in self.links and edge.contact.touching:
+                    pair = frozenset((a,b))
+                    if pair not in touching:
+                        touching.add(pair)
+                        if pair not in self.touching and a.userData<2 and b.userData<2:
+                            self.bonds.append((a,b))
+        self.touching = touching
+
+    # composition: K + 2S -> K + L
+    # convert substrate pair to link
+    def compose(self,c,c1):
+        # a spare link takes the place of the first substrate
+        if self.spare:
+            link = self.spare.pop()
+        else:
+            link = self.world.CreateDynamicBody(fixtures=L,active=False)
+            self.bodies.append(link)
+        link.position = c.position
+        link.angle = c.angle
+        link.linearVelocity = c.linearVelocity
+        link.angularVelocity = c.angularVelocity
+        link.active = True
+        link.userData = 0 # bond counter
+        self.bonded[link] = {}
+        self.membrane.add(link)
+        self.links[link] = None
+        self.schedule(link)
+        # put the substrate pair on the reserve list (we need it for decay)
+        for s in (c,c1):
+            self.park(s)
+            del self.substrate[s]
+            self.reserve.append(s)
+        self.countS -= 2
+        self.countL += 1
+        self.composed += 1
+        self.Composition(link)
+        return link
+
+    # disintegration: L -> 2S
+    # break a link back down into its substrate pair
+    def decompose(self,link):
+        entry = self.scheduled.pop(link)
+        entry[2] = None # in case it decays out of turn
+        # delete any associated joints and put the link aside for reuse
+        self.unbond(link)
+        del self.bonded[link]
+        self.membrane.discard(link)
+        del self.links[link]
+
+        # restore the substrate pair from the reserve, where the link was
+        for i in range(2):
+            s = self.reserve.pop()
+            s.position = link.position
+            s.linearVelocity = link.linearVelocity
+            s.active = True
+            self.substrate[s] = None
+        self.park(link)
+        self.spare.append(link)
+        self.countL -= 1
+        self.decomposed += 1
+        self.countS += 2
+        self.Disintegration(link)
+
+    # take a body out of the step and the broad-phase, and out of view
+    def park(self,body):
+        body.active = False
+        body.position = PARK
+        body.linearVelocity = (0, 0)
+        body.angularVelocity = 0
+
+    # sample when a new link will disintegrate and add it to the decay schedule
+    def schedule(self,link):
+        if self.continuous:
+            # exponential waiting time in simulated seconds
+            due = self.time + self.rng.exponential(self.dt/self.decay)
+        else:
+            # geometric waiting time in steps, including the current one
+            due = self.steps + self.rng.geometric(self.decay) - 1
+        entry = [due, next(self.sequence), link]
+        self.scheduled[link] = entry
+        heapq.heappush(self.decays, entry)
+
+    # Reaction events, called after each rule fires; override to observe them (e.g. auto-fx.py)
+    def Composition(self, link):
+        pass
+
+    def Concatenation(self, joint):
+        pass
+
+    def Disintegration(self, body):
+        pass
+
+    # a bond has closed a ring of links, given in order around it
+    def Closure(self, ring):
+        pass
+
+    # advance the physics by one step, returning the simulated time elapsed
+    def Physics(self, settings):
+        self.world.Step(self.dt, VELOCITY_ITERATIONS, POSITION_ITERATIONS)
+        self.world.ClearForces()
+        return self.dt
+
+    def Step(self, settings=None):
+        if self.profile is not None:
+            return self.profiledStep(settings)
+        dt = self.Physics(settings)
+        if dt<=0:
+            return # paused
+        self.time += dt
+        self.steps += 1
+        self.react()
+        self.brownian(dt)
+        self.catalyse()
+        self.concatenate()
+        self.disintegrate()
+        for observer in self.observers:
+            observer(self)
+
+    # Step, timing each phase and counting the contacts found and the reactions in each rule
+    def profiledStep(self, settings):
+        profile = self.profile
+        t = perf_counter()
+        dt = self.Physics(settings)
+        t = profile.lap("physics", t)
+        if dt<=0:
+            return # paused
+        self.time += dt
+        self.steps += 1
+        self.react()
+        t = profile.lap("react", t, sum(len(c) for c in self.contacts.values()) + len(self.bonds))
+        self.brownian(dt)
+        t = profile.lap("brownian", t)
+        n = self.composed
+        self.catalyse()
+        t = profile.lap("catalyse", t, self.composed-n)
+        n = self.concatenated
+        self.concatenate()
+        t = profile.lap("concatenate", t, self.concatenated-n)
+        n = self.decomposed
+        self.disintegrate()
+        t = profile.lap("disintegrate", t, self.decomposed-n)
+        for observer in self.observers:
+            observer(self)
+        profile.lap("observers", t)
+        profile.step()
+
+    # Apply random 'brownian' forces (Wiener process) to free bodies at each step
+    # see https://scipy-cookbook.readthedocs.io/items/BrownianMotion.html
+    def brownian(self,dt):
+        # all impulses are drawn at once, N(0, (delta^2 dt)^2) in x and y as with norm.rvs
+        free = self.catalysts + list(self.substrate) + list(self.links)
+        forces = self.rng.normal(scale=self.delta**2*dt, size=(len(free),2)).tolist()
+        for body, force in zip(free, forces):
+            body.ApplyLinearImpulse(force,body.position, True)
+
+        # catalyst pressure towards origin to avoid being trapped against the wall
+        for body in self.catalysts:
+            force = (-CENTERING*(body.position[0]-OFFX),-CENTERING*(body.position[1]-OFFY))
+            body.ApplyForce(force,body.position, True)
+
+    # composition: K + 2S -> K + L
+    # every catalyst touching two or more substrate composes a link, skipping any
+    # substrate already consumed this step by another catalyst it was touching
+    def catalyse(self):
+        for touching in self.contacts.values():
+            pair = [s for s in touching if s in self.substrate][-2:]
+            if len(pair)==2:
+                self.compose(*pair)
+
+    # concatenation: L<super>n</super> + L -> L<super>n+1</super>
+    # bond links together
+    def concatenate(self):
+        for bodyA, bodyB in self.bonds:
+            if bodyA.userData<2 and bodyB.userData<2 and not(self.acute(bodyA,bodyB)):
+                self.Concatenation(self.bond(bodyA,bodyB))
+                # bodyA had a free end, so if it is in a ring now, this bond closed it
+                ring = self.membrane.ring(bodyA)
+                if ring is not None:
+                    self.Closure(ring)
+        self.bonds = []
+
+    # disintegration:  L -> 2S
+    # random decay of links and bonds, as scheduled when each link was composed
+    def disintegrate(self):
+        now = self.time if self.continuous else self.steps
+        while self.decays and self.decays[0][0]<=now:
+            link = heapq.heappop(self.decays)[2]
+            if link is not None:
+                self.decompose(link)
+
+    # The live particles as NumPy arrays, filled in place: catalysts, then substrate, then links, one row each.
+    #   id        index in self.bodies
+    #   kind      as numbered in KINDS (0 K, 1 S, 2 L)
+    #   position, velocity    (n,2)
+    #   angle     radians
+    #   degree    bonds to each particle
+    #   edges     (m,2) the rows of each bonded pair
+    # The arrays are views of buffers reused by the next call, which grow as needed; copy them to keep them.
+    # Without velocity, the velocity array is left as it was (saving a read of every body).
+    def snapshot(self,velocity=True):
+        k, s, n = len(self.catalysts), len(self.substrate), len(self.catalysts)+len(self.substrate)+len(self.links)
+        active = self.catalysts + list(self.substrate) + list(self.links)
+        m = self.countJ
+        b = self.buffers
+        if not b or len(b["id"])<n or len(b["edges"])<m:
+            size, edges = max(n, 2*len(b.get("id",()))), max(m, 2*len(b.get("edges",())))
+            b.update(id=np.empty(size, dtype=np.int32), kind=np.empty(size, dtype=np.int8),
+                     position=np.empty((size,2)), velocity=np.empty((size,2)), angle=np.empty(size),
+                     degree=np.empty(size, dtype=np.int8), edges=np.empty((edges,2), dtype=np.int32))
+        if len(self.ids)!=len(self.bodies):
+            self.ids = {body: i for i, body in enumerate(self.bodies)}
+
+        ids = self.ids
+        b["id"][:n] = [ids[body] for body in active]
+        b["kind"][:k], b["kind"][k:k+s], b["kind"][k+s:n] = 0, 1, 2
+        p = [body.position for body in active]
+        b["position"][:n,0] = [v.x for v in p]
+        b["position"][:n,1] = [v.y for v in p]
+        if velocity:
+            v = [body.linearVelocity for body in active]
+            b["velocity"][:n,0] = [u.x for u in v]
+            b["velocity"][:n,1] = [u.y for u in v]
+        b["angle"][:n] = [body.angle for body in active]
+        b["degree"][:k+s] = 0
+        b["degree"][k+s:n] = [link.userData for link in self.links]
+        # each bond once, from the adjacency index rather than the joints
+        row = {link: i for i, link in enumerate(self.links, k+s)}
+        edges = [(row[a], row[c]) for a, partners in self.bonded.items() for c in partners if row[a]<row[c]]
+        if edges:
+            b["edges"][:m] = edges
+        return {"id": b["id"][:n], "kind": b["kind"][:n], "position": b["position"][:n], "velocity": b["velocity"][:n],
+                "angle": b["angle"][:n], "degree": b["degree"][:n], "edges": b["edges"][:m]}
+
+    # Checkpoints: the full world state as a compressed .npz of per-body arrays, with the
+    # registries, pools, bonds and decay schedule as body indices, and the scalar and RNG state as JSON.
+    # Box2D's internal contact cache is not saved; it is rebuilt in the first step after loading.
+    def save(self,path):
+        index = {b: i for i, b in enumerate(self.bodies)}
+        indices = lambda bodies: np.array([index[b] for b in bodies], dtype=np.int32)
+        pairs = lambda pairs: np.array(sorted(sorted(index[b] for b in pair) for pair in pairs), dtype=np.int32).reshape(-1,2)
+        decays = sorted(entry for entry in self.decays if entry[2] is not None)
+        state = {"version": CHECKPOINT, "time": self.time, "steps": self.steps, "delta": self.delta, "dt": self.dt,
+                 "decay": self.decay, "continuous": self.continuous, "side": self.side,
+                 "counts": [self.countS, self.countL, self.countJ],
+                 "reactions": [self.composed, self.concatenated, self.decomposed], "closures": self.membrane.closures,
+                 "rng": self.rng.bit_generator.state, "random": self.random.getstate()}
+        np.savez_compressed(path,
+            kind=np.array([KINDS[b.fixtures[0].userData] for b in self.bodies], dtype=np.int8),
+            active=np.array([b.active for b in self.bodies], dtype=bool),
+            position=np.array([tuple(b.position) for b in self.bodies]).reshape(-1,2),
+            angle=np.array([b.angle for b in self.bodies]),
+            velocity=np.array([tuple(b.linearVelocity) for b in self.bodies]).reshape(-1,2),
+            spin=np.array([b.angularVelocity for b in self.bodies]),
+            catalysts=indices(self.catalysts), substrate=indices(self.substrate), links=indices(self.links),
+            reserve=indices(self.reserve), spare=indices(self.spare),
+            joints=pairs((j.bodyA, j.bodyB) for j in self.joints), touching=pairs(self.touching),
+            due=np.array([entry[0] for entry in decays], dtype=float), decays=indices(entry[2] for entry in decays),
+            state=np.frombuffer(json.dumps(state).encode(), dtype=np.uint8))
+
+    # replace this world with a checkpoint; given a seed, the RNGs are reseeded to fork a new run
+    def load(self,path,seed=None):
+        data = np.load(path)
+        state = json.loads(data["state"].tobytes().decode())
+        if state["version"]!=CHECKPOINT:
+            raise ValueError("{} is a version {} checkpoint, expected {}".format(path,state["version"],CHECKPOINT))
+
+        for b in self.bodies:
+            self.world.DestroyBody(b) # and its joints
+        self.world.DestroyBody(self.border)
+        self.contain(state["side"])
+
+        self.bodies = [self.world.CreateDynamicBody(position=tuple(p), angle=float(a), linearVelocity=tuple(v),
+                                                    angularVelocity=float(w), fixtures=FIXTURES[kind], active=bool(active))
+                       for kind, active, p, a, v, w in zip(data["kind"], data["active"], data["position"].tolist(),
+                                                           data["angle"], data["velocity"].tolist(), data["spin"])]
+        self.ids = {}
+        bodies = lambda name: [self.bodies[i] for i in data[name]]
+        self.catalysts = bodies("catalysts")
+        self.substrate = dict.fromkeys(bodies("substrate"))
+        self.links = dict.fromkeys(bodies("links"))
+        self.reserve = bodies("reserve")
+        self.spare = bodies("spare")
+        for b in self.reserve + self.spare:
+            self.park(b)
+        self.contacts = {}
+        self.bonds = []
+        self.touching = set(frozenset(self.bodies[i] for i in pair) for pair in data["touching"])
+
+        self.countS, self.countL, self.countJ = len(self.substrate), len(self.links), 0
+        self.joints = set()
+        self.bonded = {}
+        self.membrane = Membrane()
+        for link in self.links:
+            link.userData = 0 # bond counter
+            self.bonded[link] = {}
+            self.membrane.add(link)
+        for a, b in data["joints"]:
+            self.bond(self.bodies[a], self.bodies[b])
+        self.membrane.closures = state.get("closures", self.membrane.closures)
+
+        self.decay, self.continuous = state["decay"], state["continuous"]
+        self.decays = []
+        self.scheduled = {}
+        self.sequence = count()
+        for due, i in zip(data["due"].tolist(), data["decays"]):
+            entry = [due if self.continuous else int(due), next(self.sequence), self.bodies[i]]
+            self.scheduled[entry[2]] = entry
+            self.decays.append(entry) # sorted, so already a heap
+
+        self.time, self.steps = state["time"], state["steps"]
+        self.delta, self.dt = state["delta"], state["dt"]
+        self.composed, self.concatenated, self.decomposed = state["reactions"]
+        if seed is None:
+            self.rng.bit_generator.state = state["rng"]
+            self.random.setstate(tuple(tuple(x) if isinstance(x, list) else x for x in state["random"]))
+        else:
+            self.random = random.Random(seed)
+            self.rng = np.random.default_rng(seed)
+        self.check()
+        return self
+
+    # a new world from a checkpoint
+    @classmethod
+    def restore(cls,path,seed=None):
+        return cls(0,k=0).load(path,seed)
+
+    # run headless for a fixed number of steps, as fast as the CPU allows
+    def simulate(self,steps):
+        for i in range(steps):
+            self.Step()
+        return self
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the liquid automaton headless")
+    parser.add_argument("--steps", type=int, default=36000, help="simulation steps to run")
+    parser.add_argument("--every", type=int, default=600, help="report S, L, J every n steps")
+    parser.add_argument("--pop", type=int, default=S_POP, help="substrate population")
+    parser.add_argument("--catalysts", type=int, default=1, help="catalyst population")
+    parser.add_argument("--delta", type=float, default=DELTA, help="Wiener process parameter")
+    parser.add_argument("--hz", type=float, default=HZ, help="simulation steps per second")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--continuous", action="store_true", help="decay links in continuous time")
+    parser.add_argument("--profile", action="store_true", help="time each phase of the step, reported at the end")
+    parser.add_argument("--load", default=None, help="start from this checkpoint (.npz), reseeded if --seed is given")
+    parser.add_argument("--save", default=None, help="save a checkpoint (.npz) at the end")
+    parser.add_argument("--record", default=None, help="record the trajectory into this directory")
+    parser.add_argument("--record-every", type=int, default=1, help="record every n steps")
+    args = parser.parse_args()
+
+    if args.load:
+        liquid = Liquid.restore(args.load, seed=args.seed)
+        args.steps += liquid.steps
+    else:
+        liquid = Liquid(args.pop, k=args.catalysts, delta=args.delta, hz=args.hz, seed=args.seed, continuous=args.continuous)
+    if args.profile:
+        liquid.profile = Profile()
+    if args.record:
+        from recorder import Recorder
+        recorder = Recorder(args.record, every=args.record_every).attach(liquid)
+    print("time\tS\tL\tJ\trings\tenclosed")
+    while liquid.steps<args.steps:
+        liquid.simulate(min(args.every, args.steps-liquid.steps))
+        membrane = liquid.membrane.metrics(liquid.catalysts)
+        print("{:.1f}\t{}\t{}\t{}\t{}\t{}".format(liquid.time,liquid.countS,liquid.countL,liquid.countJ,
+                                                membrane["rings"],membrane["enclosed"]))
+    if args.profile:
+        print()
+        print(liquid.profile)
+    if args.record:
+        recorder.close(liquid)
+    if args.save:
+        liquid.save(args.save)
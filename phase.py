@@ -0,0 +1,96 @@
+# Simulated Autopoiesis in Liquid Automata
+# The phase field of fig3: the flow of (delta J, delta S), binned on a dim x dim grid centred on zero.
+# Each cell accumulates the change in (delta J, delta S) from the samples falling in it, so its mean is
+# the direction the system moves from there. Samples are binned all at once with bincount, and fields
+# from several runs (or several chunks of one long run) can be merged.
+
+# e.g.
+# field = PhaseField(12).add(J, S)
+# x, y, dx, dy = field.quiver()
+
+from functools import reduce
+import numpy as np
+
+
+class PhaseField(object):
+
+    def __init__(self,dim):
+        self.dim = dim
+        self.sumx = np.zeros((dim,dim)) # rows delta S, columns delta J
+        self.sumy = np.zeros((dim,dim))
+        self.count = np.zeros((dim,dim))
+        self.dropped = 0 # samples outside the grid
+        self.tail = ([], []) # the last samples of J and S, to continue the series from
+
+    # bin a series of J and S counts, continuing any series added before
+    def add(self,J,S):
+        J = np.concatenate([self.tail[0], np.asarray(J, dtype=float)])
+        S = np.concatenate([self.tail[1], np.asarray(S, dtype=float)])
+        self.tail = (J[-2:], S[-2:])
+        x = np.diff(J)
+        y = np.diff(S)
+        dx = np.diff(x)
+        dy = np.diff(y)
+        n = len(dx)
+        if n<1:
+            return self
+        row = np.rint(y[:n] + self.dim/2).astype(int)
+        col = np.rint(x[:n] + self.dim/2).astype(int)
+        inside = (row>=0) & (row<self.dim) & (col>=0) & (col<self.dim)
+        self.dropped += n - int(inside.sum())
+        cell = row[inside]*self.dim + col[inside]
+        size = self.dim*self.dim
+        self.sumx += np.bincount(cell, dx[inside], size).reshape(self.dim,self.dim)
+        self.sumy += np.bincount(cell, dy[inside], size).reshape(self.dim,self.dim)
+        self.count += np.bincount(cell, None, size).reshape(self.dim,self.dim)
+        return self
+
+    # add another field's samples to this one (as from another run)
+    def merge(self,other):
+        if other.dim!=self.dim:
+            raise ValueError("cannot merge a {0}x{0} field into a {1}x{1} field".format(other.dim,self.dim))
+        self.sumx += other.sumx
+        self.sumy += other.sumy
+        self.count += other.count
+        self.dropped += other.dropped
+        return self
+
+    # mean flow in each cell, zero where there are no samples
+    def means(self):
+        seen = self.count>0
+        mx = np.zeros_like(self.sumx)
+        my = np.zeros_like(self.sumy)
+        mx[seen] = self.sumx[seen]/self.count[seen]
+        my[seen] = self.sumy[seen]/self.count[seen]
+        return mx, my
+
+    # the arrows of the quiver plot: position (delta J, delta S) and mean flow of every cell with samples
+    def quiver(self):
+        mx, my = self.means()
+        rows, cols = np.nonzero(self.count)
+        return cols-self.dim/2, rows-self.dim/2, mx[rows,cols], my[rows,cols]
+
+    # magnitude of the mean flow in each cell
+    def convergence(self):
+        mx, my = self.means()
+        return np.sqrt(mx**2 + my**2)
+
+    # divergence of the mean flow, as in plot.py
+    def divergence(self):
+        mx, my = self.means()
+        return reduce(np.add,np.gradient(mx)) + reduce(np.add,np.gradient(my))
+
+    # quiver arrows, convergence and divergence together
+    def fields(self):
+        return self.quiver(), self.convergence(), self.divergence()
+
+    def save(self,path):
+        np.savez(path, sumx=self.sumx, sumy=self.sumy, count=self.count, dropped=self.dropped)
+
+    @classmethod
+    def load(cls,path):
+        data = np.load(path)
+        field = cls(data["count"].shape[0])
+        field.sumx, field.sumy, field.count = data["sumx"], data["sumy"], data["count"]
+        field.dropped = int(data["dropped"])
+        return field
@@ -0,0 +1,135 @@
+# Simulated Autopoiesis in Liquid Automata
+# Plot S, L, J in a separate process, so drawing figures never holds up the simulation.
+# Counts are streamed to the plotting process through a queue, and every n samples it redraws
+#   fig1  S, L, J by time
+#   fig2  rate of change of S, L, J (moving average)
+#   fig3  phase plot of delta S by delta J
+# Figures are replaced whole, so a viewer never sees one half written.
+
+# e.g.
+# sink = PlotSink(every=60)
+# sampler.on(1, sink.update)
+# ...
+# sink.close() # draws the figures a last time
+
+import multiprocessing as mp
+import os
+from queue import Empty
+import numpy as np
+from phase import PhaseField
+
+W = 20 # moving average 'window'
+EVERY = 10 # samples between redraws
+DIM = 12 # phase plot grid
+
+def moving_average(x, w):
+    return np.convolve(x, np.ones(w), 'valid') / w
+
+
+# the plotting process: gather samples from the queue, redrawing every n, and once more at the end
+def plotter(queue,directory,every,w,dim,bonds):
+    import matplotlib
+    matplotlib.use("Agg") # no window, and nothing to share with the simulation's display
+    import matplotlib.pyplot as p
+
+    T, S, L, J = [], [], [], []
+    field = PhaseField(dim)
+
+    def save(fig, name):
+        tmp = os.path.join(directory, name+".tmp.png")
+        fig.savefig(tmp)
+        os.replace(tmp, os.path.join(directory, name+".png"))
+        p.close(fig)
+
+    def draw():
+        # Fig 1. Plot S,L,J by time
+        fig1, ax1 = p.subplots()
+        ax2 = ax1.twinx()
+        ax1.plot(T, S, label='substrate', color='red')
+        ax2.plot(T, L, label='links', color='green')
+        ax2.plot(T, J, label=bonds, color='blue')
+        ax1.set_xlabel('time')
+        ax1.set_ylabel('substrate')
+        ax2.set_ylabel('links and '+bonds)
+        fig1.legend(loc='upper left')
+        ax1.grid()
+        save(fig1, 'fig1')
+
+        # Fig 2. Plot rate of change S,L,J by time
+        if len(T)>w:
+            fig2 = p.figure()
+            s = moving_average(np.diff(S),w)
+            l = moving_average(np.diff(L),w)
+            j = moving_average(np.diff(J),w)
+            t = T[:len(s)]
+            p.plot(t, s, 'r-', label='substrate')
+            p.plot(t, l, 'g-', label='links')
+            p.plot(t, j, 'b-', label=bonds)
+            p.legend(loc='best')
+            p.xlabel('time')
+            p.ylabel('rate of change ('+str(w)+' sample moving avg)')
+            p.grid()
+            save(fig2, 'fig2')
+
+        # Fig 3. Phase Plot delta S by delta J
+        if field.count.any():
+            fig3 = p.figure()
+            (x, y, dx, dy), conv, div = field.fields()
+            # rows are delta S upwards, each cell centred on its arrow
+            p.imshow(conv, origin='lower', extent =[-dim/2-0.5, dim/2-0.5, -dim/2-0.5, dim/2-0.5])
+            p.quiver(x,y,dx,dy,pivot='mid')
+            p.grid()
+            p.xlabel('$\\Delta$ '+bonds)
+            p.ylabel('$\\Delta$ substrate')
+            save(fig3, 'fig3')
+
+    pending = [] # samples not yet in the phase field
+    drawn = 0
+    done = False
+    while not done:
+        # wait for a sample, then take any others already queued, so a slow redraw never falls behind
+        samples = [queue.get()]
+        try:
+            while True:
+                samples.append(queue.get_nowait())
+        except Empty:
+            pass
+        for sample in samples:
+            if sample is None:
+                done = True
+                break
+            T.append(sample[0])
+            S.append(sample[1])
+            L.append(sample[2])
+            J.append(sample[3])
+            pending.append(sample)
+        if done or len(T)-drawn>=every:
+            if pending:
+                field.add([s[3] for s in pending], [s[1] for s in pending])
+                pending = []
+            if T:
+                draw()
+            drawn = len(T)
+
+
+class PlotSink(object):
+
+    def __init__(self,directory="images",every=EVERY,w=W,dim=DIM,bonds="bonds"):
+        os.makedirs(directory, exist_ok=True)
+        self.queue = mp.Queue()
+        self.process = mp.Process(target=plotter, args=(self.queue, directory, every, w, dim, bonds), daemon=True)
+        self.process.start()
+
+    # send a sample; the queue's feeder thread writes it to the plotter, so this never waits on drawing
+    def put(self,time,S,L,J):
+        self.queue.put((time, S, L, J))
+
+    # as a Sampler callback (see sampler.py)
+    def update(self,sampler):
+        sample = sampler.last(1)
+        self.put(float(sample["time"][0]), float(sample["S"][0]), float(sample["L"][0]), float(sample["J"][0]))
+
+    # draw the figures a last time and wait for the plotter to finish
+    def close(self):
+        self.queue.put(None)
+        self.process.join()
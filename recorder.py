@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+# Simulated Autopoiesis in Liquid Automata
+# Record particle poses, types and bonds every n steps, for offline analysis and rendering.
+#
+# A recording is a directory of chunks, each holding a run of frames as memory-mapped .npy columns:
+#   step, time       per frame
+#   offset, edges0   per frame, where its particles and bonds start in the columns below
+#   id, kind, x, y, angle   per particle, id being the body's index in liquid.bodies
+#   edges            per bond, a pair of body ids
+# index.json describes the arena and lists the chunks written so far.
+#
+# Frames are gathered on the step thread, and written by a writer thread; at most QUEUE chunks
+# are ever waiting to be written, so memory stays bounded however long the run.
+
+import json
+import os
+import threading
+from queue import Queue
+import numpy as np
+from liquid import OFFX, OFFY, S_RADIUS, L_SIDE, K_SIDE
+
+CHUNK = 1000 # frames per chunk
+QUEUE = 4 # chunks waiting to be written
+
+# the columns of a chunk, with their types
+COLUMNS = {"step": np.int64, "time": np.float64, "offset": np.int64, "edges0": np.int64,
+           "id": np.int32, "kind": np.int8, "x": np.float32, "y": np.float32, "angle": np.float32,
+           "edges": np.int32}
+
+
+class Recorder(object):
+
+    def __init__(self,path,every=1,chunk=CHUNK,queue=QUEUE):
+        self.path = path
+        self.every = every
+        self.chunk = chunk
+        self.meta = {}
+        self.chunks = []
+        self.frames = []
+        self.queue = Queue(maxsize=queue)
+        self.error = None
+        os.makedirs(path, exist_ok=True)
+        self.writer = threading.Thread(target=self.write, daemon=True)
+        self.writer.start()
+
+    # start recording a world, after each of its steps
+    def attach(self,liquid):
+        self.meta = {"side": liquid.side, "offset": [OFFX, OFFY], "dt": liquid.dt, "every": self.every,
+                     "radius": S_RADIUS, "link": L_SIDE, "catalyst": K_SIDE}
+        self.publish()
+        liquid.observers.append(self)
+        return self
+
+    def __call__(self,liquid):
+        if liquid.steps%self.every:
+            return
+        state = liquid.snapshot(velocity=False)
+        pose = np.empty((len(state["id"]),3), dtype=np.float32)
+        pose[:,:2] = state["position"]
+        pose[:,2] = state["angle"]
+        # copies, as the snapshot's buffers are reused
+        self.frames.append((liquid.steps, liquid.time, state["id"].copy(), state["kind"].copy(), pose, state["id"][state["edges"]]))
+        if len(self.frames)==self.chunk:
+            self.flush()
+
+    # hand the frames gathered so far to the writer, waiting if it has fallen QUEUE chunks behind
+    def flush(self):
+        if self.error:
+            raise self.error
+        if self.frames:
+            self.queue.put(self.frames)
+            self.frames = []
+
+    # the writer thread: turn each chunk of frames into columns, written through memory maps
+    def write(self):
+        while True:
+            frames = self.queue.get()
+            if frames is None:
+                return
+            try:
+                name = "{:05d}".format(len(self.chunks))
+                os.makedirs(os.path.join(self.path, name), exist_ok=True)
+                counts = [len(f[2]) for f in frames]
+                bonds = [len(f[5]) for f in frames]
+                pose = np.concatenate([f[4] for f in frames])
+                columns = {"step": [f[0] for f in frames], "time": [f[1] for f in frames],
+                           "offset": np.cumsum([0]+counts[:-1]), "edges0": np.cumsum([0]+bonds[:-1]),
+                           "id": np.concatenate([f[2] for f in frames]), "kind": np.concatenate([f[3] for f in frames]),
+                           "x": pose[:,0], "y": pose[:,1], "angle": pose[:,2],
+                           "edges": np.concatenate([f[5] for f in frames])}
+                for column, data in columns.items():
+                    data = np.asarray(data, dtype=COLUMNS[column])
+                    m = np.lib.format.open_memmap(os.path.join(self.path, name, column+".npy"),
+                                                  mode="w+", dtype=data.dtype, shape=data.shape)
+                    m[...] = data
+                    m.flush()
+                    del m
+                self.chunks.append({"name": name, "frames": len(frames), "first": frames[0][0], "last": frames[-1][0]})
+                self.publish()
+            except Exception as e:
+                self.error = e
+
+    # (re)write the index, atomically, so readers only ever see complete chunks
+    def publish(self):
+        tmp = os.path.join(self.path, "index.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(dict(self.meta, chunks=self.chunks), f, indent=1)
+        os.replace(tmp, os.path.join(self.path, "index.json"))
+
+    # write out the last frames and stop, detaching from the world if given
+    def close(self,liquid=None):
+        if liquid is not None and self in liquid.observers:
+            liquid.observers.remove(self)
+        self.flush()
+        self.queue.put(None)
+        self.writer.join()
+        if self.error:
+            raise self.error
+
+
+# A recording, read back through memory maps, chunk by chunk as frames are asked for.
+class Trajectory(object):
+
+    def __init__(self,path):
+        self.path = path
+        with open(os.path.join(path, "index.json")) as f:
+            self.meta = json.load(f)
+        self.chunks = self.meta["chunks"]
+        self.starts = np.cumsum([0]+[c["frames"] for c in self.chunks])
+        self.cache = {}
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    def load(self,c):
+        if c not in self.cache:
+            name = self.chunks[c]["name"]
+            self.cache = {c: {column: np.load(os.path.join(self.path, name, column+".npy"), mmap_mode="r")
+                              for column in COLUMNS}}
+        return self.cache[c]
+
+    # frame i as a dict of step, time, and per-particle id, kind, x, y, angle and bond edges
+    def __getitem__(self,i):
+        if i<0:
+            i += len(self)
+        if not 0<=i<len(self):
+            raise IndexError(i)
+        c = int(np.searchsorted(self.starts, i, side="right")) - 1
+        chunk = self.load(c)
+        f = i - self.starts[c]
+        a, b = chunk["offset"][f], chunk["offset"][f+1] if f+1<len(chunk["offset"]) else len(chunk["id"])
+        e, g = chunk["edges0"][f], chunk["edges0"][f+1] if f+1<len(chunk["edges0"]) else len(chunk["edges"])
+        frame = {"step": int(chunk["step"][f]), "time": float(chunk["time"][f])}
+        for column in ("id", "kind", "x", "y", "angle"):
+            frame[column] = chunk[column][a:b]
+        frame["edges"] = chunk["edges"][e:g]
+        return frame
@@ -0,0 +1,123 @@
+# Simulated Autopoiesis in Liquid Automata
+# Draw a frame of particles and bonds with pygame, in the style of the Box2D Framework's debug draw
+# used by auto.py: awake dynamic bodies in one colour (solid at half intensity, outlined), circles
+# marked with their axis in red, bonds as segments between link centres, and the arena walls.
+#
+# A frame is a dict of arrays, either as read back by recorder.Trajectory (per-particle id, kind, x, y,
+# angle, and bond edges as pairs of ids) or as returned by Liquid.snapshot (position as an n x 2 array,
+# and edges as pairs of rows).
+#
+# Rather than drawing each particle's shape, every kind is drawn once at BINS rotations and cached
+# as sprites; a frame is then one batch of blits per kind, its positions and rotations worked out
+# for all particles at once with numpy, so worlds of 10k+ particles draw at interactive rates.
+
+from math import cos, sin, ceil, pi, sqrt
+import numpy as np
+import pygame
+from liquid import OFFX, OFFY, SIDE, S_RADIUS, L_SIDE, K_SIDE, triangle
+
+# Box2D debug draw colours
+BODY = (229, 178, 178) # awake dynamic body (0.9, 0.7, 0.7)
+FILL = (114, 89, 89) # body colour / 2
+AXIS = (255, 0, 0)
+BOND = (127, 204, 204) # joint (0.5, 0.8, 0.8)
+WALL = (127, 229, 127) # static body (0.5, 0.9, 0.5)
+BACKGROUND = (0, 0, 0)
+TEXT = (229, 153, 153)
+
+SIZE = (640, 480) # the Framework window
+ZOOM = 10.0 # pixels per metre in the Framework window
+
+# particle outlines in body coordinates, by kind (K, S, L); substrate is drawn as a circle
+SHAPES = [np.array(triangle(K_SIDE)), None, np.array([(-L_SIDE,-L_SIDE),(L_SIDE,-L_SIDE),(L_SIDE,L_SIDE),(-L_SIDE,L_SIDE)])]
+# the radius each kind's sprite must hold, and the turn after which it looks the same again
+EXTENTS = [K_SIDE, S_RADIUS, L_SIDE*sqrt(2)]
+PERIODS = [2*pi/3, 2*pi, pi/2]
+BINS = 64 # sprites per kind, evenly spaced through its period
+
+
+# world to screen coordinates, with y up as in the Framework
+class View(object):
+
+    def __init__(self,size=SIZE,side=SIDE,center=(OFFX,OFFY),zoom=None,arena=None):
+        self.size = size
+        self.side = side
+        self.center = center
+        self.arena = arena or center # the centre of the walls, when the view is moved off it
+        # the Framework's zoom, unless the arena would not fit
+        self.zoom = zoom or min(ZOOM, 0.95*min(size)/side)
+        self.cache = {}
+
+    def screen(self,x,y):
+        return (self.size[0]/2 + (x-self.center[0])*self.zoom,
+                self.size[1]/2 - (y-self.center[1])*self.zoom)
+
+    # the sprites of a kind at this zoom, with the offset from a particle's centre to their corner
+    def sprites(self,kind):
+        if kind not in self.cache:
+            half = int(ceil(EXTENTS[kind]*self.zoom)) + 1
+            self.cache[kind] = ([sprite(kind, PERIODS[kind]*i/BINS, half, self.zoom) for i in range(BINS)], half)
+        return self.cache[kind]
+
+
+# a particle of the given kind turned through angle a, drawn as the debug draw would around the centre
+# of a (2*half+1) pixel square, the background keyed out
+def sprite(kind,a,half,zoom):
+    surface = pygame.Surface((2*half+1, 2*half+1))
+    surface.fill(BACKGROUND)
+    c = (half, half)
+    if kind==1:
+        r = max(1, int(S_RADIUS*zoom))
+        pygame.draw.circle(surface, FILL, c, r, 0)
+        pygame.draw.circle(surface, BODY, c, r, 1)
+        pygame.draw.aaline(surface, AXIS, c, (c[0] - r*cos(a), c[1] + r*sin(a)))
+    else:
+        ca, sa = cos(a), sin(a)
+        vertices = [(c[0] + (vx*ca - vy*sa)*zoom, c[1] - (vx*sa + vy*ca)*zoom) for vx, vy in SHAPES[kind]]
+        pygame.draw.polygon(surface, FILL, vertices, 0)
+        pygame.draw.polygon(surface, BODY, vertices, 1)
+    surface.set_colorkey(BACKGROUND, pygame.RLEACCEL)
+    return surface
+
+
+def draw(surface,frame,view,text=None,font=None,clear=True):
+    if clear:
+        surface.fill(BACKGROUND)
+
+    # containment field
+    h = view.side/2
+    corners = [view.screen(view.arena[0]+dx*h, view.arena[1]+dy*h) for dx, dy in ((-1,-1),(1,-1),(1,1),(-1,1))]
+    pygame.draw.lines(surface, WALL, True, corners)
+
+    kind, angle = np.asarray(frame["kind"]), np.asarray(frame["angle"])
+    if "position" in frame:
+        sx, sy = view.screen(frame["position"][:,0], frame["position"][:,1])
+    else:
+        sx, sy = view.screen(np.asarray(frame["x"], dtype=float), np.asarray(frame["y"], dtype=float))
+    # a batch of blits per kind, in the order K, S, L as the particles are listed
+    for k in range(len(SHAPES)):
+        rows = np.flatnonzero(kind==k)
+        if len(rows)==0:
+            continue
+        sprites, half = view.sprites(k)
+        bins = (np.rint(np.mod(angle[rows], PERIODS[k])*(BINS/PERIODS[k])).astype(int) % BINS).tolist()
+        x = (np.rint(sx[rows]).astype(int) - half).tolist()
+        y = (np.rint(sy[rows]).astype(int) - half).tolist()
+        surface.blits(zip(map(sprites.__getitem__, bins), zip(x, y)), False)
+
+    # bonds join link centres
+    edges = np.asarray(frame["edges"])
+    if len(edges):
+        if "position" not in frame:
+            # recorded bonds are pairs of ids: find their rows
+            ids = frame["id"]
+            lookup = np.full(int(max(ids.max(), edges.max()))+1, -1)
+            lookup[ids] = np.arange(len(ids))
+            edges = lookup[edges]
+        ends = np.stack([sx[edges], sy[edges]], axis=-1).tolist()
+        for a, b in ends:
+            pygame.draw.aaline(surface, BOND, a, b)
+
+    if text and font:
+        for i, line in enumerate(text):
+            surface.blit(font.render(line, True, TEXT), (5, 5 + 15*i))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+# Simulated Autopoiesis in Liquid Automata
+# Replay a recorded trajectory (see recorder.py) at any speed, or export its frames as images.
+#
+# Keys: space pause, left/right step one frame, up/down double/halve speed,
+#       [ and ] seek back/forward by a tenth, 0-9 seek to that tenth, home/end first/last frame.
+
+# To run:
+# python liquid.py --steps 36000 --record run
+# python replay.py run --speed 2
+# python replay.py run --export frames --workers 4 --step 10
+
+import argparse
+import multiprocessing as mp
+import os
+import pygame
+from recorder import Trajectory
+from render import View, draw, SIZE, BACKGROUND, TEXT
+
+FPS = 60 # window refresh rate
+
+# the trajectory and surface each export worker renders with, set up by the pool initializer
+trajectory = None
+canvas = None
+view = None
+font = None
+
+def text(frame,meta):
+    kind = frame["kind"]
+    return ["step {}  time {:.1f}s".format(frame["step"], frame["time"]),
+            "S={} L={} J={}".format(int((kind==1).sum()), int((kind==2).sum()), len(frame["edges"]))]
+
+def viewer(meta,size):
+    return View(size, side=meta["side"], center=tuple(meta["offset"]))
+
+def init(path,size,hud):
+    global trajectory, canvas, view, font
+    trajectory = Trajectory(path)
+    canvas = pygame.Surface(size)
+    view = viewer(trajectory.meta, size)
+    if hud:
+        pygame.font.init()
+        font = pygame.font.SysFont(None, 18)
+
+# render frame i to directory/frameNNNNNN.png
+def export(task):
+    i, directory = task
+    frame = trajectory[i]
+    draw(canvas, frame, view, text(frame, trajectory.meta) if font else None, font)
+    pygame.image.save(canvas, os.path.join(directory, "frame{:06d}.png".format(i)))
+    return i
+
+def exportAll(path,directory,frames,size=SIZE,workers=None,hud=False):
+    os.makedirs(directory, exist_ok=True)
+    tasks = [(i, directory) for i in frames]
+    with mp.Pool(workers or mp.cpu_count(), initializer=init, initargs=(path, size, hud)) as pool:
+        for n, i in enumerate(pool.imap_unordered(export, tasks, chunksize=8)):
+            if (n+1)%100==0 or n+1==len(tasks):
+                print("{}/{} frames".format(n+1, len(tasks)))
+
+
+def play(path,speed=1.0,size=SIZE,start=0):
+    trajectory = Trajectory(path)
+    meta = trajectory.meta
+    view = viewer(meta, size)
+    # recorded frames per second of real time, at speed 1
+    rate = 1.0/(meta["dt"]*meta["every"])
+
+    pygame.init()
+    screen = pygame.display.set_mode(size)
+    pygame.display.set_caption("Liquid Automata - " + path)
+    font = pygame.font.SysFont(None, 18)
+    clock = pygame.time.Clock()
+
+    position = float(start) # fractional frame, so slow speeds advance smoothly
+    paused = False
+    running = True
+    while running:
+        n = len(trajectory)
+        for event in pygame.event.get():
+            if event.type==pygame.QUIT or (event.type==pygame.KEYDOWN and event.key==pygame.K_ESCAPE):
+                running = False
+            elif event.type==pygame.KEYDOWN:
+                if event.key==pygame.K_SPACE:
+                    paused = not paused
+                elif event.key==pygame.K_RIGHT:
+                    paused, position = True, int(position)+1
+                elif event.key==pygame.K_LEFT:
+                    paused, position = True, int(position)-1
+                elif event.key==pygame.K_UP:
+                    speed *= 2
+                elif event.key==pygame.K_DOWN:
+                    speed /= 2
+                elif event.key==pygame.K_RIGHTBRACKET:
+                    position += n/10
+                elif event.key==pygame.K_LEFTBRACKET:
+                    position -= n/10
+                elif event.key==pygame.K_HOME:
+                    position = 0
+                elif event.key==pygame.K_END:
+                    position = n-1
+                elif pygame.K_0<=event.key<=pygame.K_9:
+                    position = (event.key-pygame.K_0)*n/10
+        if n==0:
+            # nothing written yet (a recording just started): wait for its first chunk
+            screen.fill(BACKGROUND)
+            screen.blit(font.render("waiting for " + path, True, TEXT), (5, 5))
+            pygame.display.flip()
+            clock.tick(FPS)
+            trajectory = Trajectory(path)
+            continue
+        position = min(max(position, 0), n-1)
+
+        frame = trajectory[int(position)]
+        hud = text(frame, meta) + ["frame {}/{}  speed {:g}x{}".format(int(position), n, speed, "  paused" if paused else "")]
+        draw(screen, frame, view, hud, font)
+        pygame.display.flip()
+
+        seconds = clock.tick(FPS)/1000.0
+        if not paused:
+            position += seconds*rate*speed
+            if position>=n-1:
+                trajectory = Trajectory(path) # pick up chunks written since, if still recording
+                paused = position>=len(trajectory)-1
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded liquid automaton trajectory")
+    parser.add_argument("path", help="recording directory")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed, relative to simulated time")
+    parser.add_argument("--width", type=int, default=SIZE[0])
+    parser.add_argument("--height", type=int, default=SIZE[1])
+    parser.add_argument("--start", type=int, default=0, help="first frame")
+    parser.add_argument("--stop", type=int, default=None, help="last frame to export (exclusive)")
+    parser.add_argument("--step", type=int, default=1, help="export every nth frame")
+    parser.add_argument("--export", default=None, help="write frames as PNG images to this directory, without a window")
+    parser.add_argument("--workers", type=int, default=None, help="export processes (default: all cores)")
+    parser.add_argument("--hud", action="store_true", help="label exported frames with step, time and counts")
+    args = parser.parse_args()
+
+    size = (args.width, args.height)
+    if args.export:
+        n = len(Trajectory(args.path))
+        frames = range(args.start, n if args.stop is None else min(args.stop, n), args.step)
+        exportAll(args.path, args.export, frames, size, args.workers, args.hud)
+    else:
+        play(args.path, args.speed, size, args.start)
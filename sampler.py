@@ -0,0 +1,97 @@
+# Simulated Autopoiesis in Liquid Automata
+# Sample counts and derived metrics of a running world in simulation time, every n steps or every
+# n simulated seconds, into fixed-size ring buffers. Samples are independent of machine speed, so runs
+# are comparable across machines, in the GUI or headless.
+#
+# Callbacks registered with on(window, callback) fire each time another window of samples is in;
+# given a spill directory, every sample is also appended to a raw float64 file per column.
+
+# e.g.
+# sampler = Sampler(seconds=1, size=100).attach(liquid)
+# sampler.on(100, lambda sampler: print(sampler.last()["S"].mean()))
+
+import os
+import numpy as np
+
+SIZE = 1024 # samples kept
+
+# the default metrics, name -> metric(liquid)
+METRICS = {"S": lambda liquid: liquid.countS,
+           "L": lambda liquid: liquid.countL,
+           "J": lambda liquid: liquid.countJ}
+
+
+class Sampler(object):
+
+    def __init__(self,every=None,seconds=None,size=SIZE,metrics=METRICS,spill=None):
+        if (every is None)==(seconds is None):
+            raise ValueError("sample every n steps or every n seconds, not both")
+        self.every = every
+        self.seconds = seconds
+        self.size = size
+        self.metrics = metrics
+        self.columns = ["step", "time"] + list(metrics)
+        self.buffer = np.zeros((len(self.columns), size))
+        self.total = 0 # samples taken, of which the last size are kept
+        self.due = None # simulation time of the next sample
+        self.callbacks = [] # (window, callback)
+        self.spill = spill
+        if spill is not None:
+            os.makedirs(spill, exist_ok=True)
+
+    # sample a world after each of its steps
+    def attach(self,liquid):
+        liquid.observers.append(self)
+        return self
+
+    def detach(self,liquid):
+        if self in liquid.observers:
+            liquid.observers.remove(self)
+        return self
+
+    # callback(sampler) after every window samples
+    def on(self,window,callback):
+        if window>self.size:
+            raise ValueError("window of {} samples is larger than the buffer ({})".format(window,self.size))
+        self.callbacks.append((window, callback))
+        return self
+
+    def __call__(self,liquid):
+        if self.every is not None:
+            if liquid.steps%self.every:
+                return
+        else:
+            if self.due is None:
+                self.due = (liquid.time//self.seconds + 1)*self.seconds
+            # a small tolerance, as the sum of many dt is not exact
+            if liquid.time<self.due-1e-9:
+                return
+            self.due += self.seconds
+        self.sample(liquid)
+
+    def sample(self,liquid):
+        row = [liquid.steps, liquid.time] + [metric(liquid) for metric in self.metrics.values()]
+        self.buffer[:, self.total%self.size] = row
+        self.total += 1
+        if self.spill is not None:
+            for column, value in zip(self.columns, row):
+                with open(os.path.join(self.spill, column+".f8"), "ab") as f:
+                    f.write(np.float64(value).tobytes())
+        for window, callback in self.callbacks:
+            if self.total%window==0:
+                callback(self)
+
+    def __len__(self):
+        return min(self.total, self.size)
+
+    # the last n samples kept (all of them by default), oldest first, as a dict of column -> array
+    def last(self,n=None):
+        n = len(self) if n is None else min(n, len(self))
+        i = (self.total - n + np.arange(n)) % self.size
+        return {column: self.buffer[c, i] for c, column in enumerate(self.columns)}
+
+
+# every sample spilled to a directory, as a dict of column -> memory-mapped array
+def spilled(path):
+    return {name[:-3]: np.memmap(os.path.join(path, name), dtype=np.float64, mode="r")
+            for name in sorted(os.listdir(path)) if name.endswith(".f8")}
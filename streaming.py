@@ -0,0 +1,155 @@
+# Simulated Autopoiesis in Liquid Automata
+# Online statistics of a running world in constant memory, queryable at any time without stopping it:
+# mean and variance (Welford), Pearson correlation from a streaming covariance, the mean of first
+# differences, and the RMSD from a reference value.
+#
+# Statistics takes its samples from a Sampler (see sampler.py), which may then keep as few as one:
+# sampler = Sampler(seconds=1, size=1).attach(liquid)
+# stats = Statistics().attach(sampler)
+
+from math import sqrt, nan
+from scipy.stats import t as student
+
+
+# running mean and variance, by Welford's method
+class Welford(object):
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self,x):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d/self.n
+        self.m2 += d*(x - self.mean)
+
+    def variance(self,ddof=1):
+        return self.m2/(self.n-ddof) if self.n>ddof else nan
+
+    def std(self,ddof=1):
+        return sqrt(self.variance(ddof))
+
+
+# running covariance of x and y, and their Pearson correlation
+class Pearson(object):
+
+    def __init__(self):
+        self.x = Welford()
+        self.y = Welford()
+        self.c = 0.0 # sum of products of deviations
+
+    @property
+    def n(self):
+        return self.x.n
+
+    def add(self,x,y):
+        # the deviation of x from the old mean, of y from the new
+        dx = x - self.x.mean
+        self.x.add(x)
+        self.y.add(y)
+        self.c += dx*(y - self.y.mean)
+
+    def covariance(self,ddof=1):
+        return self.c/(self.n-ddof) if self.n>ddof else nan
+
+    def r(self):
+        d = sqrt(self.x.m2*self.y.m2)
+        return max(-1.0, min(1.0, self.c/d)) if d>0 else nan
+
+    # two-sided p-value for r, as scipy.stats.pearsonr
+    def pvalue(self):
+        r = self.r()
+        if self.n<3 or r!=r:
+            return nan
+        if abs(r)>=1.0:
+            return 0.0
+        t = r*sqrt((self.n-2)/(1-r*r))
+        return float(2*student.sf(abs(t), self.n-2))
+
+
+# running mean of first differences: they telescope, so only the first and last values are needed
+class Differences(object):
+
+    def __init__(self):
+        self.n = 0
+        self.first = None
+        self.last = None
+
+    def add(self,x):
+        if self.n==0:
+            self.first = x
+        self.last = x
+        self.n += 1
+
+    def mean(self):
+        return (self.last-self.first)/(self.n-1) if self.n>1 else nan
+
+
+# root mean square deviation from a reference value, also normalized by the range of the values seen
+class RMSD(object):
+
+    def __init__(self,reference):
+        self.reference = reference
+        self.n = 0
+        self.squares = 0.0
+        self.low = None
+        self.high = None
+
+    def add(self,x):
+        self.n += 1
+        self.squares += (x - self.reference)**2
+        self.low = x if self.low is None else min(self.low, x)
+        self.high = x if self.high is None else max(self.high, x)
+
+    def value(self):
+        return sqrt(self.squares/self.n) if self.n else nan
+
+    def normalized(self):
+        return self.value()/(self.high-self.low) if self.n and self.high>self.low else nan
+
+
+# the statistics of auto-stats.py and auto-tcv-pop.py for the sampled S, L, J: their moments, means of
+# first differences, the L-J and L-S correlations, and RMSD from reference values if given
+class Statistics(object):
+
+    def __init__(self,columns=("S","L","J"),pairs=(("L","J"),("L","S")),reference=None):
+        self.columns = columns
+        self.moments = {c: Welford() for c in columns}
+        self.differences = {c: Differences() for c in columns}
+        self.correlations = {pair: Pearson() for pair in pairs}
+        self.deviations = {c: RMSD(reference[c]) for c in columns} if reference else {}
+
+    # take every sample a sampler takes
+    def attach(self,sampler):
+        sampler.on(1, self.update)
+        return self
+
+    def update(self,sampler):
+        self.add({c: float(v[0]) for c, v in sampler.last(1).items()})
+
+    def add(self,sample):
+        for c in self.columns:
+            x = sample[c]
+            self.moments[c].add(x)
+            self.differences[c].add(x)
+            if c in self.deviations:
+                self.deviations[c].add(x)
+        for (a, b), pearson in self.correlations.items():
+            pearson.add(sample[a], sample[b])
+
+    @property
+    def n(self):
+        return self.moments[self.columns[0]].n
+
+    def report(self):
+        report = {"n": self.n}
+        for c in self.columns:
+            report[c] = {"mean": self.moments[c].mean, "std": self.moments[c].std(),
+                         "difference": self.differences[c].mean()}
+            if c in self.deviations:
+                report[c].update(rmsd=self.deviations[c].value(), nrmsd=self.deviations[c].normalized())
+        for (a, b), pearson in self.correlations.items():
+            report[a+b] = {"r": pearson.r(), "p": pearson.pvalue()}
+        return report
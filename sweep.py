@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+# Simulated Autopoiesis in Liquid Automata
+# Population pressure sweep (as auto-tcv-pop.py), run headless: every substrate population and replica
+# is a cell, run in a process pool. Each finished cell is written to the sweep directory as it completes,
+# so an interrupted sweep picks up where it left off, skipping the cells already done.
+
+# To run:
+# python sweep.py pressure --replicas 10
+# python sweep.py pressure --replicas 10   (again, after an interruption: only missing cells run)
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import numpy as np
+from liquid import Liquid, HZ
+from sampler import Sampler
+
+DELTA = 15
+S_POP = 700 # substrate population of the first, reference, point
+STEP = 30 # population decrement between points
+POINTS = 7
+REPLICAS = 10
+SAMPLES = 500 # samples per cell, once per simulated second
+
+# sample mean of S, L, J and of their first differences
+def summary(S,L,J):
+    return [np.mean(S), np.mean(L), np.mean(J), np.mean(np.diff(S)), np.mean(np.diff(L)), np.mean(np.diff(J))]
+
+# the table of auto-tcv-pop.py: a row per population, their mean, and the RMSD and NRMSD
+# of the other populations from the first
+def table(pops,rows):
+    rows = np.asarray(rows)
+    print("pop.\tS\tL\tJ\tDelta S\tDelta L\tDelta J")
+    for pop, row in zip(pops, rows):
+        print("{}\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}".format(pop,*row))
+    print("mean\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}".format(*np.mean(rows[1:], axis=0)))
+    rmsd = np.sqrt(np.mean(np.square(rows[1:] - rows[0]), axis=0))
+    print("RMSD\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}".format(*rmsd))
+    norm = np.max(rows[1:], axis=0) - np.min(rows[1:], axis=0)
+    print("NRMSD\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}\t{:.4f}".format(*rmsd/norm))
+
+# run one cell, writing its samples and summary to path
+def cell(task):
+    path, pop, seed, samples, delta = task
+    liquid = Liquid(pop, delta=delta, seed=seed)
+    sampler = Sampler(seconds=1, size=samples).attach(liquid)
+    liquid.simulate(int(round(samples*HZ)))
+    data = sampler.last()
+    # written whole, then renamed, so a cell on disk is always complete
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, S=data["S"], L=data["L"], J=data["J"], summary=summary(data["S"], data["L"], data["J"]))
+    os.replace(tmp, path)
+    return path
+
+
+class Sweep(object):
+
+    # any setting left None is taken from the sweep already in directory, if there is one, or a default
+    def __init__(self,directory,pops=None,replicas=None,samples=None,delta=None,seed=None,processes=None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        given = {"pops": pops, "replicas": replicas, "samples": samples, "delta": delta, "seed": seed}
+        # a sweep already started in this directory is resumed as it was configured
+        path = os.path.join(directory, "sweep.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                self.config = json.load(f)
+            conflicts = {key: value for key, value in given.items() if value is not None and value!=self.config[key]}
+            if conflicts:
+                raise ValueError("{} holds a different sweep: {} (asked for {})".format(directory, self.config, conflicts))
+        else:
+            self.config = {"pops": [S_POP-i*STEP for i in range(POINTS)], "replicas": REPLICAS, "samples": SAMPLES,
+                           "delta": DELTA, "seed": int(np.random.SeedSequence().entropy % 2**63)}
+            self.config.update((key, value) for key, value in given.items() if value is not None)
+            with open(path, "w") as f:
+                json.dump(self.config, f, indent=1)
+        self.pops = self.config["pops"]
+        self.processes = processes or mp.cpu_count()
+
+    def path(self,pop,replica):
+        return os.path.join(self.directory, "pop{}-{}.npz".format(pop, replica))
+
+    # each cell's seed depends only on the sweep seed, its population and replica
+    def seed(self,pop,replica):
+        return int(np.random.SeedSequence(self.config["seed"], spawn_key=(pop, replica)).generate_state(1)[0])
+
+    # the cells still to run, as tasks
+    def pending(self):
+        return [(self.path(pop, r), pop, self.seed(pop, r), self.config["samples"], self.config["delta"])
+                for r in range(self.config["replicas"]) for pop in self.pops if not os.path.exists(self.path(pop, r))]
+
+    # run the missing cells in a process pool, yielding each cell's path as it is written
+    def stream(self):
+        tasks = self.pending()
+        if tasks:
+            with mp.Pool(min(self.processes, len(tasks))) as pool:
+                for path in pool.imap_unordered(cell, tasks):
+                    yield path
+
+    def run(self):
+        for path in self.stream():
+            pass
+        return self
+
+    # per population, the summary averaged over its replicas
+    def rows(self):
+        return [np.mean([np.load(self.path(pop, r))["summary"] for r in range(self.config["replicas"])], axis=0)
+                for pop in self.pops]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the substrate population of the liquid automaton in parallel")
+    parser.add_argument("directory", help="where finished cells are kept; rerun to resume")
+    parser.add_argument("--pops", type=int, nargs="+", default=None, help="substrate populations, the first the reference")
+    parser.add_argument("--replicas", type=int, default=None, help="replicas per population (default: {})".format(REPLICAS))
+    parser.add_argument("--samples", type=int, default=None, help="samples per cell, once per simulated second (default: {})".format(SAMPLES))
+    parser.add_argument("--delta", type=float, default=None, help="Wiener process parameter (default: {})".format(DELTA))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    sweep = Sweep(args.directory, args.pops, args.replicas, args.samples, args.delta, args.seed, args.processes)
+    cells = len(sweep.pops)*sweep.config["replicas"]
+    done = cells - len(sweep.pending())
+    if done:
+        print("resuming: {}/{} cells already done".format(done, cells))
+    for path in sweep.stream():
+        done += 1
+        print("{} ({}/{})".format(os.path.basename(path), done, cells))
+    table(sweep.pops, sweep.rows())